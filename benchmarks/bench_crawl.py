@@ -0,0 +1,269 @@
+"""
+Crawl and /api handler benchmarks against the local Azure stand-in.
+
+    python benchmarks/bench_crawl.py                       # 10, 100, 1000 projects
+    python benchmarks/bench_crawl.py --projects 10,100 --latency-ms 50 --throttle-rate 0.02
+    python benchmarks/bench_crawl.py --output benchmarks/baselines/local.json
+    python benchmarks/bench_crawl.py --compare benchmarks/baselines/local.json
+
+For each tenant size it reports:
+  - the cold end-to-end crawl (/api/inventory's crawl_inventory) and the warm
+    (cached) one, with the requests issued per endpoint kind and the 429s
+  - p50 / p99 latency of the /api handlers under concurrent users
+  - peak traced Python memory of a cold crawl, and the process max RSS
+
+--compare exits non-zero when a crawl time or handler p99 is more than
+--tolerance slower than in the given baseline.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+# The backend modules are imported flat, as api.py does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src", "backend"))
+os.environ.setdefault("FOUNDRY_SNAPSHOT_PATH", "")
+os.environ.setdefault("FOUNDRY_REFRESH_ENABLED", "0")
+
+import httpx
+
+import auth
+import inventory
+import transport
+from response_cache import ResponseCache
+from transport import AsyncTransport
+
+from fake_azure import FakeAzure, FakeCredential
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def max_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def install(fake: FakeAzure) -> None:
+    auth.set_credential(FakeCredential())
+    # Short backoff so injected 429s cost their Retry-After, not the production backoff
+    transport.set_transport(AsyncTransport(http_transport=fake.transport(), backoff_base=0.05))
+
+
+async def run_crawl(cache: ResponseCache) -> Dict[str, Any]:
+    started = time.perf_counter()
+    done = {}
+    async for event in inventory.crawl_inventory(cache):
+        if event["type"] == "done":
+            done = event
+    return dict(done, seconds=time.perf_counter() - started)
+
+
+async def bench_crawl(fake: FakeAzure) -> Dict[str, Any]:
+    fake.reset_counters()
+    cache = ResponseCache()
+    inventory._role_indexes.clear()
+    cold = await run_crawl(cache)
+    requests = dict(fake.requests)
+    throttled = dict(fake.throttled)
+    warm = await run_crawl(cache)
+    return {
+        "coldSeconds": round(cold["seconds"], 4),
+        "warmSeconds": round(warm["seconds"], 4),
+        "projects": cold.get("projects", 0),
+        "agents": cold.get("agents", 0),
+        "errors": cold.get("errors", 0),
+        "requests": sum(requests.values()),
+        "requestsByKind": requests,
+        "throttled": sum(throttled.values()),
+    }
+
+
+async def bench_memory(fake: FakeAzure) -> Dict[str, Any]:
+    inventory._role_indexes.clear()
+    tracemalloc.start()
+    try:
+        await run_crawl(ResponseCache())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peakTracedMB": round(peak / (1024 * 1024), 2), "maxRssMB": round(max_rss_mb(), 1)}
+
+
+async def bench_handlers(fake: FakeAzure, users: int, requests_per_user: int, seed: int) -> Dict[str, Any]:
+    """Concurrent users against the API app with a cold cache: first calls load, later ones hit."""
+    import api
+
+    api.response_cache.invalidate()
+    inventory._role_indexes.clear()
+    subs = list(fake.subscriptions)
+    projects = []
+    for sub_id in subs:
+        for hub in fake.hubs[sub_id]:
+            for p in fake.hub_projects[hub["id"].lower()]:
+                projects.append((f"https://{hub['name']}.services.ai.azure.com/api/projects/{p['name']}", p["id"]))
+
+    rng = random.Random(seed)
+    latencies: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+
+    def pick() -> Tuple[str, str]:
+        route = rng.choices(["subscriptions", "resources", "agents", "access"], [1, 2, 6, 1])[0]
+        if route == "subscriptions":
+            return route, "/api/subscriptions"
+        if route == "resources":
+            return route, f"/api/resources/{rng.choice(subs)}"
+        endpoint, project_id = rng.choice(projects)
+        if route == "agents":
+            return route, "/api/agents?" + str(httpx.QueryParams({"project_endpoint": endpoint, "project_id": project_id}))
+        return route, f"/api/access{project_id}"
+
+    async def user(client: httpx.AsyncClient) -> None:
+        for _ in range(requests_per_user):
+            route, url = pick()
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.setdefault(route, []).append((time.perf_counter() - started) * 1000)
+            key = f"{route}:{response.status_code}"
+            statuses[key] = statuses.get(key, 0) + 1
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(user(client) for _ in range(users)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [l for values in latencies.values() for l in values]
+    result = {
+        "users": users,
+        "requests": len(all_latencies),
+        "throughputRps": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50Ms": round(percentile(all_latencies, 50), 3),
+        "p99Ms": round(percentile(all_latencies, 99), 3),
+        "statuses": statuses,
+        "routes": {
+            route: {"count": len(values), "p50Ms": round(percentile(values, 50), 3), "p99Ms": round(percentile(values, 99), 3)}
+            for route, values in sorted(latencies.items())
+        },
+    }
+    return result
+
+
+async def bench_size(projects: int, args: argparse.Namespace) -> Dict[str, Any]:
+    fake = FakeAzure(
+        projects=projects,
+        agents_per_project=args.agents_per_project,
+        latency=args.latency_ms / 1000,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    install(fake)
+    try:
+        result = {"projects": projects, "agents": fake.agent_count, "subscriptions": len(fake.subscriptions)}
+        result["crawl"] = await bench_crawl(fake)
+        result["handlers"] = await bench_handlers(fake, args.users, args.requests_per_user, args.seed)
+        if not args.no_memory:
+            result["memory"] = await bench_memory(fake)
+        return result
+    finally:
+        await transport.close_transport()
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path) as f:
+        baseline = {r["projects"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["projects"])
+        if base is None:
+            continue
+        checks = [
+            ("crawl.coldSeconds", result["crawl"]["coldSeconds"], base["crawl"]["coldSeconds"]),
+            ("crawl.requests", result["crawl"]["requests"], base["crawl"]["requests"]),
+            ("handlers.p99Ms", result["handlers"]["p99Ms"], base["handlers"]["p99Ms"]),
+        ]
+        for name, value, reference in checks:
+            ratio = value / reference if reference else 1.0
+            print(f"  {result['projects']:>5} projects  {name:<20} {reference:>10} -> {value:>10}  ({ratio:.2f}x)")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{result['projects']} projects: {name} {reference} -> {value}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", default="10,100,1000", help="comma-separated tenant sizes")
+    parser.add_argument("--agents-per-project", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--throttle-rate", type=float, default=0.01)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests-per-user", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slower) traced memory pass")
+    parser.add_argument("--verbose", action="store_true", help="keep the backend's own log output")
+    parser.add_argument("--output", help="write results as JSON (a baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = []
+    with open(os.devnull, "w") as devnull:
+        for size in [int(s) for s in args.projects.split(",") if s]:
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                result = asyncio.run(bench_size(size, args))
+            crawl, handlers = result["crawl"], result["handlers"]
+            print(
+                f"{size:>5} projects / {result['agents']} agents: crawl cold {crawl['coldSeconds']:.2f}s "
+                f"warm {crawl['warmSeconds'] * 1000:.1f}ms, {crawl['requests']} requests ({crawl['throttled']} throttled), "
+                f"handlers p50 {handlers['p50Ms']:.1f}ms p99 {handlers['p99Ms']:.1f}ms"
+                + (f", peak {result['memory']['peakTracedMB']}MB" if "memory" in result else "")
+            )
+            results.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
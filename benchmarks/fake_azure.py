@@ -0,0 +1,259 @@
+"""
+Local stand-in for ARM and the Foundry agents API, used by the benchmarks.
+
+Serves a synthetic tenant (subscriptions -> AIServices hubs -> projects ->
+agents, plus role assignments) from memory through an httpx transport, so
+FoundryClient runs its real request, pagination, retry and parsing paths
+without touching Azure. Latency and 429 throttling are injected per request.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from azure.core.credentials import AccessToken
+
+ARM_HOST = "management.azure.com"
+ARM_PAGE_SIZE = 100
+
+MODELS = ["gpt-4o", "gpt-4o-mini", "gpt-4.1", "o3-mini", "gpt-35-turbo"]
+MODEL_WEIGHTS = [40, 25, 15, 10, 10]
+ROLES = ["Owner", "Contributor", "Azure AI Developer", "Azure AI User", "Reader"]
+
+
+class FakeCredential:
+    """Stands in for DefaultAzureCredential."""
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+
+def _tool(rng: random.Random, agent_index: int) -> Dict[str, Any]:
+    kind = rng.choices(
+        ["file_search", "code_interpreter", "mcp", "bing_grounding", "azure_ai_search", "memory_search", "function", "openapi"],
+        [30, 20, 15, 10, 10, 5, 5, 5],
+    )[0]
+    tool: Dict[str, Any] = {"type": kind}
+    if kind == "mcp":
+        if rng.random() < 0.5:
+            tool["server_label"] = rng.choice(["github", "jira", "servicenow"])
+        tool["server_url"] = rng.choice(["https://api.githubcopilot.com/mcp", "https://mcp.contoso.com"])
+    elif kind == "bing_grounding":
+        tool["connection_id"] = f"/subscriptions/s/resourceGroups/rg/providers/x/connections/bing{agent_index % 3}"
+    elif kind == "azure_ai_search":
+        tool["index_name"] = f"index-{agent_index % 7}"
+        tool["connection_id"] = f"/subscriptions/s/resourceGroups/rg/providers/x/connections/search{agent_index % 2}"
+    elif kind == "memory_search":
+        tool["memory_store_name"] = f"memory-{agent_index % 4}"
+    elif kind in ("function", "openapi"):
+        tool["name"] = f"{kind}_{agent_index % 11}"
+    return tool
+
+
+class FakeAzure:
+    """
+    Synthetic tenant with `projects` projects, `projects_per_hub` projects per
+    AIServices hub and `hubs_per_subscription` hubs per subscription.
+
+    latency: mean seconds added to every response (uniform +/-50%)
+    throttle_rate: fraction of requests answered 429 with Retry-After: retry_after
+    """
+
+    def __init__(
+        self,
+        projects: int = 10,
+        agents_per_project: int = 10,
+        projects_per_hub: int = 5,
+        hubs_per_subscription: int = 10,
+        assignments_per_project: int = 5,
+        latency: float = 0.02,
+        throttle_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: int = 42,
+    ):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.throttled: Counter = Counter()
+
+        rng = random.Random(seed)
+        self.subscriptions: List[str] = []
+        self.hubs: Dict[str, List[Dict[str, Any]]] = {} # subscription -> cog accounts
+        self.hub_projects: Dict[str, List[Dict[str, Any]]] = {} # hub id (lower) -> projects
+        self.agents: Dict[str, List[Dict[str, Any]]] = {} # "hub/project" -> agent details
+        self.assignments: Dict[str, List[Dict[str, Any]]] = {} # subscription -> assignments
+
+        hub_count = max(1, -(-projects // projects_per_hub))
+        for h in range(hub_count):
+            sub_index = h // hubs_per_subscription
+            sub_id = f"00000000-0000-0000-0000-{sub_index:012d}"
+            if sub_id not in self.hubs:
+                self.subscriptions.append(sub_id)
+                self.hubs[sub_id] = []
+                self.assignments[sub_id] = []
+            hub_name = f"hub{h}"
+            hub_id = f"/subscriptions/{sub_id}/resourceGroups/rg{h % 3}/providers/Microsoft.CognitiveServices/accounts/{hub_name}"
+            self.hubs[sub_id].append({
+                "id": hub_id,
+                "name": hub_name,
+                "location": "eastus",
+                "kind": "AIServices",
+                "properties": {"endpoint": f"https://{hub_name}.cognitiveservices.azure.com/", "defaultProject": f"{hub_name}-p0"},
+            })
+            hub_project_list = []
+            for p in range(min(projects_per_hub, projects - h * projects_per_hub)):
+                project_name = f"{hub_name}-p{p}"
+                project_id = f"{hub_id}/projects/{project_name}"
+                hub_project_list.append({"id": project_id, "name": project_name, "location": "eastus"})
+                self.agents[f"{hub_name}/{project_name}"] = [
+                    self._agent(rng, hub_name, project_name, a) for a in range(agents_per_project)
+                ]
+                for r in range(assignments_per_project):
+                    self.assignments[sub_id].append(self._assignment(rng, project_id, len(self.assignments[sub_id])))
+            self.hub_projects[hub_id.lower()] = hub_project_list
+        for sub_id in self.subscriptions:
+            # Subscription-wide assignments, inherited by every project
+            for r in range(3):
+                self.assignments[sub_id].append(self._assignment(rng, f"/subscriptions/{sub_id}", len(self.assignments[sub_id])))
+
+    def _agent(self, rng: random.Random, hub_name: str, project_name: str, index: int) -> Dict[str, Any]:
+        tools = [_tool(rng, index) for _ in range(rng.randint(0, 4))]
+        resources: Dict[str, Any] = {}
+        if any(t["type"] == "file_search" for t in tools):
+            resources["file_search"] = {"vector_store_ids": [f"vs_{project_name}_{index}"]}
+        created = 1700000000 + index * 60
+        return {
+            "id": f"agent-{index}",
+            "name": f"{project_name}-agent-{index}",
+            "object": "agent",
+            "versions": {
+                "latest": {
+                    "created_at": created,
+                    "definition": {
+                        "kind": "prompt",
+                        "model": rng.choices(MODELS, MODEL_WEIGHTS)[0],
+                        "instructions": "You are a helpful assistant. " * 20,
+                        "tools": tools,
+                        "tool_resources": resources,
+                    },
+                }
+            },
+        }
+
+    def _assignment(self, rng: random.Random, scope: str, index: int) -> Dict[str, Any]:
+        return {
+            "id": f"{scope}/providers/Microsoft.Authorization/roleAssignments/ra{index}",
+            "name": f"ra{index}",
+            "properties": {
+                "principalId": f"principal-{rng.randint(0, 200)}",
+                "principalType": rng.choice(["User", "Group", "ServicePrincipal"]),
+                "roleDefinitionId": f"/providers/Microsoft.Authorization/roleDefinitions/{rng.choice(ROLES)}",
+                "scope": scope,
+            },
+        }
+
+    @property
+    def project_count(self) -> int:
+        return len(self.agents)
+
+    @property
+    def agent_count(self) -> int:
+        return sum(len(a) for a in self.agents.values())
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def reset_counters(self) -> None:
+        self.requests.clear()
+        self.throttled.clear()
+
+    # --- Request handling ---
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        url = urlsplit(str(request.url))
+        kind = self._kind(url.netloc, url.path)
+        self.requests[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self._rng.uniform(0.5, 1.5))
+        if self.throttle_rate and self._rng.random() < self.throttle_rate:
+            self.throttled[kind] += 1
+            return httpx.Response(429, headers={"Retry-After": str(self.retry_after)}, json={"error": {"code": "TooManyRequests"}})
+
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.netloc == ARM_HOST:
+            return self._arm(kind, url.path, query)
+        return self._agents_api(kind, url.netloc, url.path, query)
+
+    def _kind(self, host: str, path: str) -> str:
+        if host != ARM_HOST:
+            return "agent_detail" if path.rstrip("/").split("/")[-2] == "agents" else "agents_list"
+        if path.endswith("/roleAssignments"):
+            return "role_assignments"
+        if path.endswith("/projects"):
+            return "hub_projects"
+        if path.endswith("Microsoft.CognitiveServices/accounts"):
+            return "cog_accounts"
+        if path.endswith("Microsoft.MachineLearningServices/workspaces"):
+            return "ml_workspaces"
+        return "subscriptions"
+
+    def _page(self, items: List[Dict[str, Any]], path: str, query: Dict[str, str]) -> httpx.Response:
+        skip = int(query.get("$skipToken", "0"))
+        body: Dict[str, Any] = {"value": items[skip:skip + ARM_PAGE_SIZE]}
+        if skip + ARM_PAGE_SIZE < len(items):
+            params = dict(query, **{"$skipToken": str(skip + ARM_PAGE_SIZE)})
+            body["nextLink"] = f"https://{ARM_HOST}{path}?" + "&".join(f"{k}={v}" for k, v in params.items())
+        return httpx.Response(200, content=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+
+    def _arm(self, kind: str, path: str, query: Dict[str, str]) -> httpx.Response:
+        parts = path.strip("/").split("/")
+        if kind == "subscriptions":
+            return self._page([{"subscriptionId": s, "displayName": f"Subscription {i}"} for i, s in enumerate(self.subscriptions)], path, query)
+        sub_id = parts[1]
+        if kind == "cog_accounts":
+            return self._page(self.hubs.get(sub_id, []), path, query)
+        if kind == "ml_workspaces":
+            return self._page([], path, query)
+        if kind == "hub_projects":
+            return self._page(self.hub_projects.get("/" + "/".join(parts[:-1]).lower(), []), path, query)
+        # role_assignments: the listing at a scope returns assignments at, above and below it
+        scope = "/" + "/".join(parts[:-3]).lower()
+        matching = [
+            a for a in self.assignments.get(sub_id, [])
+            if scope.startswith(a["properties"]["scope"].lower()) or a["properties"]["scope"].lower().startswith(scope + "/")
+        ]
+        return self._page(matching, path, query)
+
+    def _agents_api(self, kind: str, host: str, path: str, query: Dict[str, str]) -> httpx.Response:
+        # https://{hub}.services.ai.azure.com/api/projects/{project}/agents[/{id}]
+        hub_name = host.split(".")[0]
+        parts = path.strip("/").split("/")
+        agents = self.agents.get(f"{hub_name}/{parts[2]}")
+        if agents is None:
+            return httpx.Response(404, json={"error": {"code": "NotFound"}})
+        if kind == "agent_detail":
+            for agent in agents:
+                if agent["id"] == parts[-1]:
+                    return httpx.Response(200, json=agent)
+            return httpx.Response(404, json={"error": {"code": "NotFound"}})
+
+        limit = int(query.get("limit", "20"))
+        start = 0
+        if "after" in query:
+            start = next((i + 1 for i, a in enumerate(agents) if a["id"] == query["after"]), len(agents))
+        page = agents[start:start + limit]
+        items = [
+            {"id": a["id"], "name": a["name"], "object": "agent", "versions": {"latest": {"created_at": a["versions"]["latest"]["created_at"]}}}
+            for a in page
+        ]
+        return httpx.Response(200, json={
+            "data": items,
+            "has_more": start + limit < len(agents),
+            "last_id": items[-1]["id"] if items else None,
+        })
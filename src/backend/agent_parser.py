@@ -0,0 +1,208 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Batches smaller than this are parsed inline; a process pool only pays off for bulk parsing
+PARSE_POOL_THRESHOLD = int(os.getenv("FOUNDRY_PARSE_POOL_THRESHOLD", "5000"))
+
+# Keys already rendered elsewhere, skipped by the resource id fallback scan
+_RESOURCE_SCAN_SKIP = frozenset(["type", "name", "connection_id", "server_label", "server_url", "project_connection_id"])
+
+
+class _AgentResources:
+    """Per-agent view of tool_resources; lookups shared by all tools are computed once."""
+
+    __slots__ = ("raw", "_file_search")
+
+    _UNSET = object()
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+        self._file_search = self._UNSET
+
+    def file_search_connection(self) -> Optional[str]:
+        if self._file_search is self._UNSET:
+            # Display the first vector store ID associated in resources
+            vs_ids = self.raw.get("file_search", {}).get("vector_store_ids", [])
+            self._file_search = f"VS: {vs_ids[0]}" if vs_ids else None
+        return self._file_search
+
+    def memory_store(self, t_type: str) -> Optional[str]:
+        mem_resources = self.raw.get(t_type, {})
+        if not mem_resources and "memory_search" in self.raw:
+            mem_resources = self.raw["memory_search"]
+        if isinstance(mem_resources, dict) and "memory_store_name" in mem_resources:
+            return mem_resources["memory_store_name"]
+        return None
+
+
+# --- Extractors: (tool, resources, tool_info) -> None, filling tool_info["connection"] ---
+
+def _extract_mcp(t: Dict[str, Any], resources: _AgentResources, tool_info: Dict[str, Any]) -> None:
+    # server_label, else project_connection_id, else server_url
+    if "server_label" in t:
+        tool_info["connection"] = t["server_label"]
+    elif "project_connection_id" in t:
+        tool_info["connection"] = t["project_connection_id"]
+    elif "server_url" in t:
+        tool_info["connection"] = t["server_url"]
+
+
+def _extract_file_search(t: Dict[str, Any], resources: _AgentResources, tool_info: Dict[str, Any]) -> None:
+    connection = resources.file_search_connection()
+    if connection:
+        tool_info["connection"] = connection
+
+
+def _extract_memory_search(t: Dict[str, Any], resources: _AgentResources, tool_info: Dict[str, Any]) -> None:
+    # Memory config may be in the tool definition itself or in the resources
+    if "memory_store_name" in t:
+        tool_info["connection"] = t["memory_store_name"]
+    else:
+        store = resources.memory_store(t["type"])
+        if store is not None:
+            tool_info["connection"] = store
+
+
+def _extract_index(t: Dict[str, Any], resources: _AgentResources, tool_info: Dict[str, Any]) -> None:
+    if "index_name" in t:
+        tool_info["connection"] = f"Index: {t['index_name']}"
+
+
+Extractor = Callable[[Dict[str, Any], _AgentResources, Dict[str, Any]], None]
+
+# Exact tool types take precedence over the substring rules below
+TOOL_EXTRACTORS: Dict[str, Extractor] = {
+    "mcp": _extract_mcp,
+    "file_search": _extract_file_search,
+}
+
+# (substrings, extractor): used when no exact extractor matched, first match wins
+SUBSTRING_EXTRACTORS: List[Tuple[Tuple[str, ...], Extractor]] = [
+    (("memory", "search"), _extract_memory_search),
+]
+
+# (substrings, extractor): applied after the above, whatever the type
+OVERLAY_EXTRACTORS: List[Tuple[Tuple[str, ...], Extractor]] = [
+    (("azure_ai_search", "cognitive_search"), _extract_index),
+]
+
+
+@lru_cache(maxsize=1024)
+def extractors_for(t_type: str) -> Tuple[Extractor, ...]:
+    """The extractor chain for a tool type, resolved once per distinct type."""
+    chain = []
+    exact = TOOL_EXTRACTORS.get(t_type)
+    if exact is not None:
+        chain.append(exact)
+    else:
+        for substrings, extractor in SUBSTRING_EXTRACTORS:
+            if any(s in t_type for s in substrings):
+                chain.append(extractor)
+                break
+    for substrings, extractor in OVERLAY_EXTRACTORS:
+        if any(s in t_type for s in substrings):
+            chain.append(extractor)
+    return tuple(chain)
+
+
+def parse_tool(t: Dict[str, Any], resources: _AgentResources) -> Dict[str, Any]:
+    t_type = t.get('type', 'unknown')
+    tool_info = {"type": t_type}
+    if "name" in t:
+        tool_info["name"] = t["name"]
+
+    # Connection info
+    if "connection_id" in t:
+        tool_info["connection"] = t["connection_id"].split('/')[-1]
+
+    for extractor in extractors_for(t_type):
+        extractor(t, resources, tool_info)
+
+    # Other resource IDs (fallback)
+    for k, v in t.items():
+        if isinstance(v, str) and k not in _RESOURCE_SCAN_SKIP and "/subscriptions/" in v:
+            tool_info["resource_id"] = v.split('/')[-1]
+
+    return tool_info
+
+
+def parse_agent(agent: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parses agent data into a structure suitable for graph visualization.
+    Returns:
+        {
+            "id": str,
+            "name": str,
+            "model": str,
+            "tools": List[Dict],
+            "resources": List[Dict]
+        }
+    """
+    # Extract details from 'versions' -> 'latest' if available
+    latest_version = agent.get('versions', {}).get('latest', {})
+    definition = latest_version.get('definition', {})
+
+    # Fallback
+    name = agent.get('name', 'Unknown Agent')
+    agent_id = agent.get('id', 'unknown')
+    model = definition.get('model') or agent.get('model') or "Unknown Model"
+
+    raw_tools = definition.get("tools") or agent.get("tools", [])
+    # Resources map links tools with their stores (e.g. file_search -> vector_store)
+    raw_resources = definition.get("tool_resources") or agent.get("resources", {})
+    resources = _AgentResources(raw_resources)
+
+    tools_data = [parse_tool(t, resources) for t in raw_tools]
+
+    resources_data = []
+    if raw_resources:
+        for k, v in raw_resources.items():
+            if isinstance(v, dict):
+                for sub_k, sub_v in v.items():
+                    resources_data.append({"type": k, "detail": f"{sub_k}: {sub_v}"})
+            else:
+                resources_data.append({"type": k, "detail": str(v)})
+
+    return {
+        "id": agent_id,
+        "name": name,
+        "model": model,
+        "tools": tools_data,
+        "resources": resources_data
+    }
+
+
+# Shared by every bulk parse; created on first use (see _parse_pool)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_pool(processes: Optional[int]) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn": forking a process that runs an event loop and worker threads can deadlock
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stops the pool's worker processes (the next bulk parse starts a new pool)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def parse_agents(agents: Iterable[Dict[str, Any]], processes: Optional[int] = None, chunksize: int = 256) -> List[Dict[str, Any]]:
+    """
+    Parses many agents, preserving order. Batches of at least
+    PARSE_POOL_THRESHOLD agents are spread over one shared process pool
+    (`processes` workers when it is first created, default one per CPU)
+    unless `processes` is 1.
+    """
+    agents = list(agents)
+    if processes == 1 or len(agents) < PARSE_POOL_THRESHOLD:
+        return [parse_agent(a) for a in agents]
+    return list(_parse_pool(processes).map(parse_agent, agents, chunksize=chunksize))
@@ -1,35 +1,97 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 import os
 import sys
+from typing import List
 
 # Add backend directory to path to import foundry_client if needed, 
 # but since we are in the same package, relative import might work or just standard import
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from foundry_client import FoundryClient
+from transport import close_transport
+from agent_parser import shutdown_parse_pool
+from response_cache import ResponseCache
+from change_feed import ChangeFeed
+from snapshot_store import open_snapshot_store
+from inventory_archive import InventoryArchive
+from http_responses import REVALIDATE, FastJSONResponse, FingerprintedStaticFiles, HTTPCacheMiddleware, dumps
+from scheduler import REFRESH_ENABLED, RefreshScheduler
+from errors import FoundryError
+from auth import get_token_cache
+import metrics
+import inventory
 from pydantic import BaseModel
 
-app = FastAPI()
+# Versioned diffs of what the cache stores, served by /api/changes
+change_feed = ChangeFeed()
+# Cache in front of the FoundryClient calls, shared by every request
+response_cache = ResponseCache(feed=change_feed)
+# Background crawler that keeps response_cache warm off the request path
+refresh_scheduler = RefreshScheduler(response_cache)
+
+# Exported inventory (see export_inventory.py) to serve instead of crawling Azure
+INVENTORY_ARCHIVE_PATH = os.getenv("FOUNDRY_INVENTORY_ARCHIVE", "")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INVENTORY_ARCHIVE_PATH:
+        # Offline mode: every loader reads the archive, so no snapshot or background refresh
+        archive = InventoryArchive(INVENTORY_ARCHIVE_PATH)
+        inventory.use_archive(archive)
+        print(f"Serving inventory archive {archive.path} ({os.path.getsize(archive.path)} bytes)")
+        yield
+        inventory.use_archive(None)
+        archive.close()
+        return
+    # Serve the last persisted crawl immediately after a restart
+    store = open_snapshot_store()
+    if store is not None:
+        restored = store.load_into(response_cache)
+        response_cache.store = store
+        print(f"Restored {restored} inventory entries from {store.path}")
+    if REFRESH_ENABLED:
+        refresh_scheduler.start()
+    yield
+    await refresh_scheduler.stop()
+    # Release pooled keep-alive connections and parser workers on shutdown
+    await close_transport()
+    shutdown_parse_pool()
+    if store is not None:
+        response_cache.store = None
+        store.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+# ETag / 304 and gzip / brotli for everything served, API and static alike
+app.add_middleware(HTTPCacheMiddleware)
+
+@app.exception_handler(FoundryError)
+async def foundry_error_handler(request, exc: FoundryError):
+    # Throttling / upstream failures surface as typed errors, never as empty lists
+    headers = {"Retry-After": str(int(exc.retry_after + 0.999))} if exc.retry_after else None
+    return FastJSONResponse(status_code=exc.http_status, content=exc.to_dict(), headers=headers)
 
 # Serve Static Files (CSS, JS, Images)
 static_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend", "static")
-app.mount("/static", StaticFiles(directory=static_path), name="static")
+# Asset URLs carry content hashes (?v=...), so they are cached as immutable
+static_files = FingerprintedStaticFiles(directory=static_path)
+app.mount("/static", static_files, name="static")
 
 # API Endpoints
 @app.get("/api/subscriptions")
 async def get_subscriptions():
     try:
-        client = FoundryClient() # No endpoint needed
-        return client.get_subscriptions()
+        return FastJSONResponse(await inventory.load_subscriptions(response_cache))
+    except FoundryError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/resources/{subscription_id}")
 async def get_resources(subscription_id: str):
     try:
-        client = FoundryClient()
-        return client.get_foundry_resources(subscription_id)
+        return FastJSONResponse(await inventory.load_resources(response_cache, subscription_id))
+    except FoundryError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,18 +101,18 @@ async def get_agents(project_endpoint: str, project_id: str = None):
         raise HTTPException(status_code=400, detail="Project Endpoint is required")
     
     try:
-        client = FoundryClient(project_endpoint=project_endpoint)
         # get_agents now returns parsed agents with access info
-        agents = client.get_agents(project_id=project_id)
-        return agents
+        agents = await inventory.load_agents(response_cache, project_endpoint, project_id)
+        # Returned directly: rendering skips jsonable_encoder's walk over every agent
+        return FastJSONResponse(agents)
+    except FoundryError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/access/{resource_id:path}")
 async def get_access(resource_id: str):
     try:
-        # We need a client, but endpoint doesn't matter for this call
-        client = FoundryClient(project_endpoint="dummy")
         # resource_id comes with /subscriptions/..., so we prepend nothing or handle it
         # The client.get_role_assignments expects the full ID starting with /subscriptions
         # FastAPI path param might strip leading slash? Let's check.
@@ -59,17 +121,124 @@ async def get_access(resource_id: str):
         if not resource_id.startswith("/"):
             resource_id = "/" + resource_id
             
-        assignments = client.get_role_assignments(resource_id)
-        return assignments
+        assignments = await inventory.load_access(response_cache, resource_id)
+        return FastJSONResponse(assignments)
+    except FoundryError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/inventory")
+async def get_inventory():
+    # Full subscription -> hub -> project -> agent crawl in one call,
+    # streamed as NDJSON so the dashboard can render incrementally
+    async def stream():
+        async for event in inventory.crawl_inventory(response_cache):
+            yield dumps(event) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/api/graph")
+async def get_graph():
+    # Deduplicated node/edge lists with integer references into one string table
+    try:
+        graph = await inventory.load_graph(response_cache)
+        return FastJSONResponse(graph.to_payload())
+    except FoundryError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/query")
+async def query_agents(
+    model: List[str] = Query(None),
+    tool: List[str] = Query(None),
+    connection: List[str] = Query(None),
+    project: List[str] = Query(None),
+    flag: List[str] = Query(None),
+    q: str = None,
+    principal: str = None,
+    offset: int = 0,
+    limit: int = 50,
+):
+    # Faceted agent search; repeat a parameter to OR values, e.g. ?model=gpt-4o&model=o3
+    try:
+        index = await inventory.load_query_index(response_cache)
+        filters = {"model": model, "tool": tool, "connection": connection, "project": project, "flag": flag}
+        return FastJSONResponse(index.query(filters, text=q, principal=principal, offset=max(offset, 0), limit=min(max(limit, 0), 1000)))
+    except FoundryError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/query/actions")
+async def governance_actions(limit: int = 5):
+    # "Top 5 Governance Actions" (deprecated models, external MCP servers, broad access, ...)
+    try:
+        index = await inventory.load_query_index(response_cache)
+        return index.actions(limit=limit)
+    except FoundryError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/query/principals/{principal_id}")
+async def principal_scopes(principal_id: str):
+    # Scopes a principal holds role assignments on, and how many agents that reaches
+    try:
+        index = await inventory.load_query_index(response_cache)
+        return index.principal(principal_id)
+    except FoundryError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/changes")
+async def get_changes(since: int):
+    # Agents, projects and role assignments added / removed / modified after `since`
+    # (the "version" of /api/inventory's done event or of a previous call)
+    return change_feed.changes(since)
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache(kind: str = None, scope: str = None):
+    # kind: subscriptions | resources | agents | access | role_assignments
+    # scope: subscription id (subscriptions: ""), resource id (access), or for agents
+    # the project id or endpoint ("<project endpoint>|<project id>" is the full key)
+    return {"invalidated": response_cache.invalidate(kind=kind, scope=scope)}
+
+@app.get("/api/refresh/status")
+async def get_refresh_status():
+    # Last refresh time, duration and error count per subscription
+    return refresh_scheduler.status()
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus scrape endpoint; cache ratios / sizes are sampled at scrape time
+    cache_stats = response_cache.stats()
+    token_stats = get_token_cache().stats()
+    metrics.CACHE_HIT_RATIO.set(cache_stats["hitRatio"], cache="response")
+    metrics.CACHE_HIT_RATIO.set(token_stats["hitRatio"], cache="token")
+    metrics.CACHE_ENTRIES.set(cache_stats["entries"], cache="response")
+    metrics.CACHE_ENTRIES.set(len(token_stats["scopes"]), cache="token")
+    metrics.CACHE_INFLIGHT.set(cache_stats["inflight"], cache="response")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    stats = dict(response_cache.stats(), changeFeed=change_feed.stats())
+    if inventory.archive is not None:
+        stats["archive"] = inventory.archive.stats()
+    return stats
+
 
 # Serve Frontend
 @app.get("/")
 async def read_index():
     index_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend", "index.html")
-    return FileResponse(index_path)
+    with open(index_path, encoding="utf-8") as f:
+        html = f.read()
+    # Points the page at the current asset versions; the page itself is revalidated (ETag)
+    return HTMLResponse(static_files.rewrite(html), headers={"Cache-Control": REVALIDATE})
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,110 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+from azure.identity import DefaultAzureCredential
+
+MGMT_SCOPE = "https://management.azure.com/.default"
+AI_SCOPE = "https://ai.azure.com/.default"
+
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("FOUNDRY_TOKEN_REFRESH_MARGIN", "300"))
+
+_credential: Optional[DefaultAzureCredential] = None
+_token_cache: Optional["TokenCache"] = None
+
+
+def get_credential() -> DefaultAzureCredential:
+    """Process-wide credential, so the credential chain is only probed once."""
+    global _credential
+    if _credential is None:
+        _credential = DefaultAzureCredential()
+    return _credential
+
+
+def set_credential(credential: Optional[Any]) -> None:
+    """Replaces the process-wide credential (None resets to DefaultAzureCredential on next use)."""
+    global _credential, _token_cache
+    _credential = credential
+    _token_cache = None
+
+
+class TokenCache:
+    """
+    Access tokens keyed by scope.
+    A token inside the refresh margin is still served while a single background
+    refresh runs; an expired or missing token makes callers wait, and concurrent
+    callers share one in-flight `get_token` call per scope.
+    """
+
+    def __init__(self, credential: Optional[Any] = None, refresh_margin: int = TOKEN_REFRESH_MARGIN):
+        self._credential = credential
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[str, Any] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def credential(self) -> Any:
+        return self._credential or get_credential()
+
+    async def get_token(self, scope: str) -> str:
+        token = self._tokens.get(scope)
+        now = time.time()
+        if token is not None and token.expires_on > now:
+            self.hits += 1
+            if token.expires_on - self.refresh_margin <= now:
+                # Refresh ahead of expiry without making this caller wait
+                self._refresh(scope)
+            return token.token
+
+        self.misses += 1
+        token = await asyncio.shield(self._refresh(scope))
+        return token.token
+
+    def _refresh(self, scope: str) -> asyncio.Future:
+        future = self._inflight.get(scope)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(scope))
+            self._inflight[scope] = future
+            future.add_done_callback(lambda f: self._on_refreshed(scope, f))
+        return future
+
+    def _on_refreshed(self, scope: str, future: asyncio.Future) -> None:
+        self._inflight.pop(scope, None)
+        # Retrieve the failure of a background refresh nobody awaited, so it is
+        # not reported as "never retrieved" (_fetch has already printed it)
+        if not future.cancelled():
+            future.exception()
+
+    async def _fetch(self, scope: str) -> Any:
+        # DefaultAzureCredential is blocking (it may shell out to the Azure CLI),
+        # so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            token = await loop.run_in_executor(None, self.credential.get_token, scope)
+        except Exception as e:
+            print(f"Error refreshing token for {scope}: {e}")
+            raise
+        self.refreshes += 1
+        self._tokens[scope] = token
+        return token
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hitRatio": (self.hits / total) if total else 0.0,
+            "scopes": {scope: int(t.expires_on) for scope, t in self._tokens.items()},
+        }
+
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
@@ -0,0 +1,124 @@
+import os
+import time
+import bisect
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from response_cache import CacheKey
+
+# Number of change records kept; clients further behind get a full reload
+CHANGE_FEED_MAX = int(os.getenv("FOUNDRY_CHANGE_FEED_MAX", "50000"))
+
+
+def _agents_by_id(scope: str, value: Any) -> Optional[Dict[str, Any]]:
+    # scope is "project_endpoint|project_id"
+    project_id = scope.rsplit("|", 1)[-1]
+    return {f"{a.get('projectId') or project_id}|{a.get('id')}": a for a in value or []}
+
+
+def _projects_by_id(scope: str, value: Any) -> Optional[Dict[str, Any]]:
+    return {p.get("id"): p for p in (value or {}).get("projects", [])}
+
+
+def _assignments_by_id(scope: str, value: Any) -> Optional[Dict[str, Any]]:
+    # None means the subscription's assignments were not readable: nothing is known
+    if value is None:
+        return None
+    return {a.get("id"): a for a in value}
+
+
+# Cache kind -> (entity name in the feed, cached value -> {entity id: entity})
+ENTITY_SOURCES: Dict[str, Tuple[str, Callable[[str, Any], Optional[Dict[str, Any]]]]] = {
+    "agents": ("agent", _agents_by_id),
+    "resources": ("project", _projects_by_id),
+    "role_assignments": ("roleAssignment", _assignments_by_id),
+}
+
+
+def changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    return sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+
+
+class ChangeFeed:
+    """
+    Versioned view of the inventory for /api/changes. Every time the response
+    cache stores agents, resources or role assignments, the new value is
+    diffed against the previous one for the same scope (agents compare the
+    parse_agent_graph_data output field by field) and one record per added,
+    removed or modified entity is appended under a new version.
+    """
+
+    def __init__(self, max_changes: int = CHANGE_FEED_MAX):
+        self.max_changes = max_changes
+        # Seeded from the clock so versions handed out by an earlier process are always older
+        self.version = int(time.time() * 1000)
+        # Oldest version a client can resume from
+        self.floor = self.version
+        self._versions: List[int] = []
+        self._changes: List[Dict[str, Any]] = []
+        # (cache kind, scope) -> {entity id: entity} as last seen
+        self._state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def observe(self, key: CacheKey, value: Any) -> None:
+        source = ENTITY_SOURCES.get(key[0])
+        if source is None:
+            return
+        entity, index = source
+        current = index(key[1], value)
+        if current is None:
+            return
+        previous = self._state.get((key[0], key[1]), {})
+        self._state[(key[0], key[1])] = current
+
+        for entity_id, item in current.items():
+            old = previous.get(entity_id)
+            if old is None:
+                self._append(entity, "added", entity_id, key[1], item)
+            elif old is not item and old != item:
+                self._append(entity, "modified", entity_id, key[1], item, changed_fields(old, item))
+        for entity_id in previous.keys() - current.keys():
+            self._append(entity, "removed", entity_id, key[1], None)
+
+    def _append(self, entity: str, op: str, entity_id: str, scope: str, value: Any, fields: Optional[List[str]] = None) -> None:
+        self.version += 1
+        record = {"version": self.version, "entity": entity, "op": op, "id": entity_id, "scope": scope, "value": value}
+        if fields is not None:
+            record["changed"] = fields
+        self._versions.append(self.version)
+        self._changes.append(record)
+        if len(self._changes) > self.max_changes * 2:
+            # Trim in batches rather than on every append
+            drop = len(self._changes) - self.max_changes
+            self.floor = self._versions[drop - 1]
+            del self._versions[:drop]
+            del self._changes[:drop]
+
+    def changes(self, since: int) -> Dict[str, Any]:
+        """
+        Changes after version `since`, latest record per entity only. "reset"
+        is set when `since` is older than the retained history (or comes from
+        another process); the client should then reload the full inventory.
+        """
+        if since < self.floor or since > self.version:
+            return {"version": self.version, "reset": True, "changes": []}
+        start = bisect.bisect_right(self._versions, since)
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for record in self._changes[start:]:
+            key = (record["entity"], record["id"])
+            prior = latest.pop(key, None)
+            if prior is not None and record["op"] == "modified":
+                if prior["op"] == "added":
+                    # Did not exist at `since`: still an addition for this client
+                    record = {k: v for k, v in record.items() if k != "changed"}
+                    record["op"] = "added"
+                elif prior["op"] == "modified":
+                    record = dict(record, changed=sorted(set(prior["changed"]) | set(record["changed"])))
+            latest[key] = record
+        return {"version": self.version, "reset": False, "changes": list(latest.values())}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "floor": self.floor,
+            "records": len(self._changes),
+            "scopes": len(self._state),
+        }
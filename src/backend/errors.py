@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+
+
+class FoundryError(Exception):
+    """
+    A transient failure talking to ARM or a Foundry project, raised once the
+    transport has given up retrying. Unlike other errors these are never
+    turned into empty results, so throttling does not look like "no agents".
+    """
+
+    kind = "error"
+    http_status = 502
+
+    def __init__(
+        self,
+        message: str,
+        endpoint: Optional[str] = None,
+        url: Optional[str] = None,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.url = url
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "error": self.kind,
+            "message": str(self),
+            "endpoint": self.endpoint,
+            "statusCode": self.status_code,
+            "retryAfter": self.retry_after,
+        }
+
+
+class ThrottledError(FoundryError):
+    """429 responses kept coming after all retries."""
+
+    kind = "throttled"
+    http_status = 429
+
+
+class UpstreamError(FoundryError):
+    """5xx responses or connection failures after all retries."""
+
+    kind = "upstream_error"
+    http_status = 502
+
+
+class CircuitOpenError(FoundryError):
+    """The endpoint's circuit breaker is open; the call was not attempted."""
+
+    kind = "circuit_open"
+    http_status = 503
+
+
+class RequestFailedError(FoundryError):
+    """A non-retryable failure (auth, 4xx, unexpected response) with nothing cached to fall back to."""
+
+    kind = "request_failed"
+    http_status = 502
+
+
+class WarmingUpError(FoundryError):
+    """Nothing is cached yet for a whole-inventory view; a crawl is filling the cache."""
+
+    kind = "warming_up"
+    http_status = 503
+
+
+def as_foundry_error(error: Exception) -> FoundryError:
+    if isinstance(error, FoundryError):
+        return error
+    return RequestFailedError(str(error) or type(error).__name__, status_code=getattr(getattr(error, "response", None), "status_code", None))
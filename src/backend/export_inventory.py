@@ -0,0 +1,114 @@
+"""
+Streams a full crawl (subscriptions, hubs, projects, parsed agents and role
+assignments) to a compressed NDJSON file that the API can serve offline:
+
+    python src/backend/export_inventory.py -o inventory.ndjson.gz
+    FOUNDRY_INVENTORY_ARCHIVE=inventory.ndjson.gz python src/backend/api.py
+
+Events are written as the crawl produces them and dropped afterwards, so
+memory stays flat however large the tenant is. `zcat` on the file gives the
+same events as /api/inventory (see inventory_archive.py for the layout).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import platform
+from typing import Any, Dict, Optional
+
+import inventory
+from errors import FoundryError
+from inventory_archive import ArchiveWriter
+from response_cache import ResponseCache
+from transport import close_transport
+
+# Only enough entries for the crawl in flight; exported values are not kept
+EXPORT_CACHE_ENTRIES = 256
+
+
+async def _role_assignments(cache: ResponseCache, subscription_id: str) -> Optional[Any]:
+    """Subscription-scope role assignment listing, None when it is not readable."""
+    try:
+        return await inventory.load_role_assignments(cache, subscription_id)
+    except FoundryError as e:
+        print(f"Role assignments unavailable for {subscription_id}: {e}")
+        return None
+
+
+async def export(path: str, level: int) -> Dict[str, Any]:
+    cache = ResponseCache(max_entries=EXPORT_CACHE_ENTRIES)
+    readable_roles: Dict[str, bool] = {}
+    # Subscription id -> projects whose agents (or error) are still to come
+    pending_projects: Dict[str, int] = {}
+    done: Dict[str, Any] = {}
+    # Written to a temporary name so a failed export never replaces a good one
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        writer = ArchiveWriter(f, level=level)
+        writer.write_meta(host=platform.node())
+        async for event in inventory.crawl_inventory(cache):
+            kind = event["type"]
+            subscription_id = event.get("subscriptionId", "")
+            if kind == "subscriptions":
+                writer.write("subscriptions", "", event)
+            elif kind == "resources":
+                writer.write("resources", subscription_id, event)
+                assignments = await _role_assignments(cache, subscription_id)
+                readable_roles[subscription_id] = assignments is not None
+                if assignments is not None:
+                    writer.write("role_assignments", subscription_id, {
+                        "type": "role_assignments", "subscriptionId": subscription_id, "assignments": assignments,
+                    })
+                pending_projects[subscription_id] = len(event.get("projects", []))
+            elif kind == "agents":
+                # Same scope as the load_agents cache key
+                writer.write("agents", f"{event['projectEndpoint']}|{event['projectId']}", event)
+                if not readable_roles.get(subscription_id, True):
+                    # No subscription-wide listing: keep the per-project one /api/access would fetch
+                    try:
+                        assignments = await inventory.load_access(cache, event["projectId"])
+                    except Exception as e:
+                        print(f"Access unavailable for {event['projectId']}: {e}")
+                    else:
+                        writer.write("access", event["projectId"], {
+                            "type": "access", "subscriptionId": subscription_id, "projectId": event["projectId"], "assignments": assignments,
+                        })
+            elif kind == "done":
+                done = event
+                writer.write("done", "", event)
+            else:
+                writer.write(kind, f"{subscription_id}|{event.get('projectId', '')}", event)
+            if kind in ("agents", "error") and event.get("projectId"):
+                pending_projects[subscription_id] -= 1
+            if pending_projects.get(subscription_id) == 0:
+                # The subscription's agents have their access counts: nothing needs its role index now
+                del pending_projects[subscription_id]
+                inventory.release_role_index(cache, subscription_id)
+            if writer.members % 500 == 0:
+                print(f"  {writer.members} entries, {f.tell() / (1024 * 1024):.1f} MB")
+        size = f.tell()
+    os.replace(partial, path)
+    await close_transport()
+    return dict(done, members=writer.members, bytes=size, rawBytes=writer.raw_bytes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=time.strftime("inventory-%Y%m%d-%H%M%S.ndjson.gz"))
+    parser.add_argument("--level", type=int, default=6, help="gzip compression level (1-9)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = asyncio.run(export(args.output, args.level))
+    ratio = result["rawBytes"] / result["bytes"] if result["bytes"] else 0
+    print(
+        f"Exported {result.get('subscriptions', 0)} subscriptions, {result.get('projects', 0)} projects, "
+        f"{result.get('agents', 0)} agents ({result.get('errors', 0)} errors) to {args.output}: "
+        f"{result['bytes'] / (1024 * 1024):.1f} MB ({ratio:.1f}x compressed) in {time.perf_counter() - started:.1f}s"
+    )
+    return 1 if result.get("errors") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,146 +1,134 @@
 import os
-import requests
+import asyncio
 import json
-from azure.identity import DefaultAzureCredential
-from typing import List, Dict, Any, Optional
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional
+import metrics
+from transport import AsyncTransport, get_transport
+from errors import FoundryError
+from agent_parser import parse_agent, parse_agents
+from auth import AI_SCOPE, MGMT_SCOPE, TokenCache, get_credential, get_token_cache
+
+# ARM API versions per listing (also part of the API response cache keys)
+SUBSCRIPTIONS_API_VERSION = "2022-12-01"
+COG_ACCOUNTS_API_VERSION = "2025-06-01"
+ML_WORKSPACES_API_VERSION = "2023-08-01-preview"
+HUB_PROJECTS_API_VERSION = "2024-10-01"
+ROLE_ASSIGNMENTS_API_VERSION = "2022-04-01"
+AGENTS_API_VERSION = "2025-11-15-preview"
+
+# Bounds for the per-agent detail fan-out in get_agents
+AGENT_DETAIL_CONCURRENCY = int(os.getenv("FOUNDRY_AGENT_DETAIL_CONCURRENCY", "8"))
+AGENT_DETAIL_DEADLINE = float(os.getenv("FOUNDRY_AGENT_DETAIL_DEADLINE", "30"))
+# Bound for the per-hub project listings in get_foundry_resources
+HUB_PROJECT_CONCURRENCY = int(os.getenv("FOUNDRY_HUB_PROJECT_CONCURRENCY", "8"))
+
+def agent_stamp(agent: Dict[str, Any]) -> Optional[Any]:
+    """Change marker of an agent list item (None if it carries no timestamp)."""
+    latest_version = agent.get('versions', {}).get('latest', {})
+    return agent.get('updated_at') or latest_version.get('created_at')
 
 class FoundryClient:
-    def __init__(self, project_endpoint: Optional[str] = None):
+    def __init__(self, project_endpoint: Optional[str] = None, transport: Optional[AsyncTransport] = None, token_cache: Optional[TokenCache] = None, raise_errors: bool = False):
         self.project_endpoint = project_endpoint or os.getenv("PROJECT_ENDPOINT")
         # Allow initialization without endpoint for resource listing
-        self.credential = DefaultAzureCredential()
-        self.api_version = "2025-11-15-preview"
+        # Credential and tokens are shared process-wide, so constructing a client is cheap
+        self.credential = get_credential()
+        self.token_cache = token_cache or get_token_cache()
+        # By default failures are logged and an empty result is returned, except
+        # FoundryError (throttling, 5xx, open circuit) which always propagates so it
+        # is never mistaken for "no data". raise_errors propagates everything from
+        # the top-level call; a failed sub-listing (one hub's projects, an
+        # unregistered provider, a project's role assignments) is still skipped.
+        self.raise_errors = raise_errors
+        self.api_version = AGENTS_API_VERSION
+        # Shared keep-alive pool; every client instance reuses the same connections
+        self.transport = transport or get_transport()
+        self.detail_concurrency = AGENT_DETAIL_CONCURRENCY
+        self.detail_deadline = AGENT_DETAIL_DEADLINE
+        self.hub_concurrency = HUB_PROJECT_CONCURRENCY
 
-    def _get_token(self) -> str:
-        return self.credential.get_token("https://ai.azure.com/.default").token
+    async def _get_token(self) -> str:
+        return await self.token_cache.get_token(AI_SCOPE)
 
-    def _get_mgmt_token(self) -> str:
-        return self.credential.get_token("https://management.azure.com/.default").token
+    async def _get_mgmt_token(self) -> str:
+        return await self.token_cache.get_token(MGMT_SCOPE)
 
-    def get_subscriptions(self) -> List[Dict[str, Any]]:
-        url = "https://management.azure.com/subscriptions?api-version=2022-12-01"
-        try:
-            token = self._get_mgmt_token()
-            headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get(url, headers=headers, timeout=10)
+    async def _iter_arm_pages(self, url: str, headers: Dict[str, str], timeout: float = 10, endpoint: str = "arm") -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields the `value` array of each page of an ARM list response,
+        following `nextLink` until the listing is exhausted.
+        """
+        next_url = url
+        while next_url:
+            response = await self.transport.get(next_url, headers=headers, timeout=timeout, endpoint=endpoint)
             response.raise_for_status()
-            return response.json().get("value", [])
+            data = response.json()
+            yield data.get("value", [])
+            next_url = data.get("nextLink")
+
+    async def _collect_arm(self, url: str, headers: Dict[str, str], timeout: float = 10, endpoint: str = "arm") -> List[Dict[str, Any]]:
+        items = []
+        async for page in self._iter_arm_pages(url, headers, timeout, endpoint):
+            items.extend(page)
+        return items
+
+    async def iter_subscriptions(self) -> AsyncIterator[Dict[str, Any]]:
+        url = f"https://management.azure.com/subscriptions?api-version={SUBSCRIPTIONS_API_VERSION}"
+        token = await self._get_mgmt_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        async for page in self._iter_arm_pages(url, headers, endpoint="subscriptions"):
+            for item in page:
+                yield item
+
+    async def get_subscriptions(self) -> List[Dict[str, Any]]:
+        try:
+            return [sub async for sub in self.iter_subscriptions()]
         except Exception as e:
             print(f"Error fetching subscriptions: {e}")
+            if self.raise_errors or isinstance(e, FoundryError):
+                raise
             return []
 
-    def get_foundry_resources(self, subscription_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    async def get_foundry_resources(self, subscription_id: str) -> Dict[str, List[Dict[str, Any]]]:
         # 1. Fetch Cognitive Services Accounts (The "Hubs")
         # Using 2025-06-01 to ensure 'defaultProject' property is returned as per user requirement
-        cog_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.CognitiveServices/accounts?api-version=2025-06-01"
+        cog_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.CognitiveServices/accounts?api-version={COG_ACCOUNTS_API_VERSION}"
         
         # 2. Fetch ML Workspaces (The "Projects")
-        ml_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.MachineLearningServices/workspaces?api-version=2023-08-01-preview"
+        ml_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.MachineLearningServices/workspaces?api-version={ML_WORKSPACES_API_VERSION}"
         
-        hubs = []
-        projects = []
+        timings = {}
+        started = time.perf_counter()
         
         try:
-            token = self._get_mgmt_token()
+            token = await self._get_mgmt_token()
             headers = {"Authorization": f"Bearer {token}"}
+            timings["token"] = time.perf_counter() - started
             
-            # Fetch Hubs (Cognitive Services)
-            hub_endpoints = {}
-            try:
-                resp_cog = requests.get(cog_url, headers=headers, timeout=30)
-                resp_cog.raise_for_status()
-                cog_items = resp_cog.json().get("value", [])
-                for item in cog_items:
-                    # Only list resources of kind 'AIServices' as requested
-                    kind = item.get("kind", "").lower()
-                    if kind != "aiservices":
-                        continue
-
-                    props = item.get("properties", {})
-                    endpoint = props.get("endpoint")
-                    default_project = props.get("defaultProject")
-                    hub_endpoints[item["id"].lower()] = endpoint
-                    hubs.append({
-                        "id": item["id"],
-                        "name": item["name"],
-                        "location": item["location"],
-                        "resourceGroup": item["id"].split("/")[4],
-                        "kind": item.get("kind", "").lower(),
-                        "endpoint": endpoint,
-                        "type": "Microsoft.CognitiveServices/accounts",
-                        "defaultProject": default_project
-                    })
-            except Exception as e:
-                print(f"Error fetching CogServices: {e}")
-
-            # Fetch Projects (ML Workspaces)
-            try:
-                resp_ml = requests.get(ml_url, headers=headers, timeout=30)
-                resp_ml.raise_for_status()
-                ml_items = resp_ml.json().get("value", [])
-                for item in ml_items:
-                    if item.get("kind", "").lower() == "project":
-                        props = item.get("properties", {})
-                        hub_id = props.get("hubResourceId")
-                        
-                        # Construct the correct Agents API endpoint based on User's instruction
-                        # Format: https://{hub_name}.services.ai.azure.com/api/projects/{project_name}
-                        
-                        endpoint = None
-                        if hub_id:
-                            hub_name = hub_id.split("/")[-1]
-                            # Use services.ai.azure.com as requested
-                            endpoint = f"https://{hub_name}.services.ai.azure.com/api/projects/{item['name']}"
-                        
-                        if not endpoint:
-                             # Fallback to discoveryUrl
-                             endpoint = props.get("discoveryUrl")
-                             if not endpoint:
-                                 endpoint = f"https://{item['name']}.{item['location']}.api.azureml.ms"
-                        
-                        projects.append({
-                            "id": item["id"],
-                            "name": item["name"],
-                            "location": item["location"],
-                            "resourceGroup": item["id"].split("/")[4],
-                            "kind": "project",
-                            "endpoint": endpoint,
-                            "hubId": hub_id
-                        })
-            except Exception as e:
-                print(f"Error fetching ML Workspaces: {e}")
+            # Hubs and ML Workspaces are independent listings, fetch them together
+            phase_start = time.perf_counter()
+            hubs, projects = await asyncio.gather(
+                self._list_hubs(cog_url, headers),
+                self._list_ml_projects(ml_url, headers)
+            )
+            timings["listings"] = time.perf_counter() - phase_start
 
             # 3. Fetch Cognitive Services Projects (Child resources of Hubs)
             # These are Microsoft.CognitiveServices/accounts/projects
             # We need to iterate over hubs to find them, or use a subscription-level list if available.
-            # Subscription-level list for sub-resources is not standard, so we iterate hubs.
-            
-            for hub in hubs:
-                try:
-                    # List projects under this hub
-                    # API Version for projects: 2024-10-01 or similar
-                    proj_url = f"https://management.azure.com{hub['id']}/projects?api-version=2024-10-01"
-                    resp_proj = requests.get(proj_url, headers=headers, timeout=10)
-                    if resp_proj.status_code == 200:
-                        sub_projects = resp_proj.json().get("value", [])
-                        for sp in sub_projects:
-                            # Construct endpoint for these projects
-                            # Usually: https://{hub_name}.services.ai.azure.com/api/projects/{project_name}
-                            hub_name = hub["name"]
-                            project_name = sp["name"]
-                            endpoint = f"https://{hub_name}.services.ai.azure.com/api/projects/{project_name}"
-                            
-                            projects.append({
-                                "id": sp["id"],
-                                "name": sp["name"],
-                                "location": sp["location"],
-                                "resourceGroup": sp["id"].split("/")[4],
-                                "kind": "project",
-                                "endpoint": endpoint,
-                                "hubId": hub["id"]
-                            })
-                except Exception as e:
-                    print(f"Error fetching projects for hub {hub['name']}: {e}")
+            # Subscription-level list for sub-resources is not standard, so we fan out per hub.
+            phase_start = time.perf_counter()
+            semaphore = asyncio.Semaphore(self.hub_concurrency)
+
+            async def list_hub(hub: Dict[str, Any]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._list_hub_projects(hub, headers)
+
+            # gather keeps hub order, so the merged project list is deterministic
+            for hub_projects in await asyncio.gather(*(list_hub(hub) for hub in hubs)):
+                projects.extend(hub_projects)
+            timings["hub_projects"] = time.perf_counter() - phase_start
 
             # Add "Self-Projects" for Hubs that might be standalone Foundry projects
             existing_project_ids = set(p["id"] for p in projects)
@@ -170,21 +158,150 @@ class FoundryClient:
             
         except Exception as e:
             print(f"Error in get_foundry_resources: {e}")
+            if self.raise_errors or isinstance(e, FoundryError):
+                raise
             return {"hubs": [], "projects": []}
+        finally:
+            timings["total"] = time.perf_counter() - started
+            # Per-phase durations go to the resources_* phases of foundry_phase_duration_seconds
+            for phase, seconds in timings.items():
+                metrics.PHASE_DURATION.observe(seconds, phase=f"resources_{phase}")
 
-    def get_role_assignments(self, resource_id: str) -> List[Dict[str, Any]]:
-        url = f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleAssignments?api-version=2022-04-01"
+    async def _list_hubs(self, cog_url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        # Fetch Hubs (Cognitive Services)
+        hubs = []
         try:
-            token = self._get_mgmt_token()
-            headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.json().get("value", [])
+            cog_items = await self._collect_arm(cog_url, headers, timeout=30, endpoint="cog_accounts")
+            for item in cog_items:
+                # Only list resources of kind 'AIServices' as requested
+                kind = item.get("kind", "").lower()
+                if kind != "aiservices":
+                    continue
+
+                props = item.get("properties", {})
+                endpoint = props.get("endpoint")
+                default_project = props.get("defaultProject")
+                hubs.append({
+                    "id": item["id"],
+                    "name": item["name"],
+                    "location": item["location"],
+                    "resourceGroup": item["id"].split("/")[4],
+                    "kind": item.get("kind", "").lower(),
+                    "endpoint": endpoint,
+                    "type": "Microsoft.CognitiveServices/accounts",
+                    "defaultProject": default_project
+                })
+        except Exception as e:
+            print(f"Error fetching CogServices: {e}")
+            if isinstance(e, FoundryError):
+                raise
+        return hubs
+
+    async def _list_ml_projects(self, ml_url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        # Fetch Projects (ML Workspaces)
+        projects = []
+        try:
+            ml_items = await self._collect_arm(ml_url, headers, timeout=30, endpoint="ml_workspaces")
+            for item in ml_items:
+                if item.get("kind", "").lower() == "project":
+                    props = item.get("properties", {})
+                    hub_id = props.get("hubResourceId")
+                    
+                    # Construct the correct Agents API endpoint based on User's instruction
+                    # Format: https://{hub_name}.services.ai.azure.com/api/projects/{project_name}
+                    
+                    endpoint = None
+                    if hub_id:
+                        hub_name = hub_id.split("/")[-1]
+                        # Use services.ai.azure.com as requested
+                        endpoint = f"https://{hub_name}.services.ai.azure.com/api/projects/{item['name']}"
+                    
+                    if not endpoint:
+                         # Fallback to discoveryUrl
+                         endpoint = props.get("discoveryUrl")
+                         if not endpoint:
+                             endpoint = f"https://{item['name']}.{item['location']}.api.azureml.ms"
+                    
+                    projects.append({
+                        "id": item["id"],
+                        "name": item["name"],
+                        "location": item["location"],
+                        "resourceGroup": item["id"].split("/")[4],
+                        "kind": "project",
+                        "endpoint": endpoint,
+                        "hubId": hub_id
+                    })
+        except Exception as e:
+            print(f"Error fetching ML Workspaces: {e}")
+            if isinstance(e, FoundryError):
+                raise
+        return projects
+
+    async def _list_hub_projects(self, hub: Dict[str, Any], headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        projects = []
+        try:
+            # List projects under this hub
+            # API Version for projects: 2024-10-01 or similar
+            proj_url = f"https://management.azure.com{hub['id']}/projects?api-version={HUB_PROJECTS_API_VERSION}"
+            sub_projects = await self._collect_arm(proj_url, headers, timeout=10, endpoint="hub_projects")
+            for sp in sub_projects:
+                # Construct endpoint for these projects
+                # Usually: https://{hub_name}.services.ai.azure.com/api/projects/{project_name}
+                hub_name = hub["name"]
+                project_name = sp["name"]
+                endpoint = f"https://{hub_name}.services.ai.azure.com/api/projects/{project_name}"
+                
+                projects.append({
+                    "id": sp["id"],
+                    "name": sp["name"],
+                    "location": sp["location"],
+                    "resourceGroup": sp["id"].split("/")[4],
+                    "kind": "project",
+                    "endpoint": endpoint,
+                    "hubId": hub["id"]
+                })
+        except Exception as e:
+            print(f"Error fetching projects for hub {hub['name']}: {e}")
+            if isinstance(e, FoundryError):
+                raise
+        return projects
+
+    async def iter_role_assignments(self, resource_id: str) -> AsyncIterator[Dict[str, Any]]:
+        url = f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleAssignments?api-version={ROLE_ASSIGNMENTS_API_VERSION}"
+        token = await self._get_mgmt_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        async for page in self._iter_arm_pages(url, headers, endpoint="role_assignments"):
+            for item in page:
+                yield item
+
+    async def get_role_assignments(self, resource_id: str) -> List[Dict[str, Any]]:
+        try:
+            return [r async for r in self.iter_role_assignments(resource_id)]
         except Exception as e:
             print(f"Error fetching role assignments for {resource_id}: {e}")
+            if self.raise_errors or isinstance(e, FoundryError):
+                raise
             return []
 
-    def get_agents(self, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def _access_count(self, project_id: str) -> int:
+        """Distinct principals with a role on the project, 0 when they cannot be read."""
+        try:
+            role_assignments = [r async for r in self.iter_role_assignments(project_id)]
+        except Exception as e:
+            print(f"Error fetching role assignments for {project_id}: {e}")
+            if isinstance(e, FoundryError):
+                raise
+            return 0
+        return len(set(r["properties"]["principalId"] for r in role_assignments))
+
+    async def get_agents(self, project_id: Optional[str] = None, previous: Optional[List[Dict[str, Any]]] = None, access_count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Lists and parses the project's agents. `previous` is an earlier result of
+        this call (e.g. from a snapshot); agents whose `updatedAt` is unchanged
+        are reused from it instead of re-fetching their details. When the
+        caller already knows the project's `access_count` (e.g. from a
+        RoleAssignmentIndex) the role-assignment lookup is skipped.
+        """
         # If the endpoint already has /api/projects/, we append /agents
         # The user example: https://.../api/projects/{project}/agents
         
@@ -194,62 +311,157 @@ class FoundryClient:
              # Fallback for old style endpoints
              url = f"{self.project_endpoint.rstrip('/')}/agents"
              
-        print(f"Fetching agents from: {url}") # Debug log
+        started = time.perf_counter()
         params = {
             "api-version": self.api_version,
             "limit": 100
         }
         
-        # Fetch Access Info if project_id is provided
-        access_count = 0
-        role_assignments = []
-        
-        if project_id:
-            # 1. Access Control
-            role_assignments = self.get_role_assignments(project_id)
-            unique_principals = set(r["properties"]["principalId"] for r in role_assignments)
-            access_count = len(unique_principals)
-
         try:
-            token = self._get_token()
+            token = await self._get_token()
             headers = {
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json"
             }
 
-            response = requests.get(url, params=params, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            items = data.get("value") or data.get("data") or []
-            
-            full_agents = []
-            for item in items:
-                agent_id = item.get('id')
-                full_agent = item
-                if agent_id:
-                    details = self.get_agent_details(agent_id, headers)
-                    if details:
-                        full_agent = details
-                
-                # Parse and inject access info
-                parsed = self.parse_agent_graph_data(full_agent)
+            # Access Control lookup runs alongside the agent listing
+            if project_id and access_count is None:
+                full_agents, access_count = await asyncio.gather(
+                    self._fetch_and_parse_agents(url, params, headers, previous),
+                    self._access_count(project_id)
+                )
+            else:
+                full_agents = await self._fetch_and_parse_agents(url, params, headers, previous)
+                access_count = access_count or 0
+
+            for parsed in full_agents:
+                # Inject access info
                 parsed["accessCount"] = access_count
                 parsed["projectId"] = project_id # Store for detailed view
-                
-                full_agents.append(parsed)
             
             return full_agents
 
         except Exception as e:
             print(f"Error fetching agents: {e}")
+            if self.raise_errors or isinstance(e, FoundryError):
+                raise
             return []
+        finally:
+            metrics.PHASE_DURATION.observe(time.perf_counter() - started, phase="agents")
+
+    async def _iter_agent_pages(self, url: str, params: Dict[str, Any], headers: Dict[str, str]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields each page of the agents listing. Follows `nextLink` when the
+        service returns one, otherwise the `has_more` / `last_id` cursor.
+        """
+        params = dict(params)
+        next_url = url
+        while next_url:
+            response = await self.transport.get(next_url, params=params, headers=headers, timeout=30, endpoint="agents_list")
+            response.raise_for_status()
+            
+            data = response.json()
+            yield data.get("value") or data.get("data") or []
 
-    def get_agent_details(self, agent_id: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+            if data.get("nextLink"):
+                # nextLink already carries the query string
+                next_url, params = data["nextLink"], None
+            elif data.get("has_more") and data.get("last_id") and data["last_id"] != (params or {}).get("after"):
+                params = dict(params or {}, after=data["last_id"])
+            else:
+                next_url = None
+
+    async def iter_agents(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yields raw agent list items across all pages."""
+        url = f"{self.project_endpoint.rstrip('/')}/agents"
+        params = {"api-version": self.api_version, "limit": 100}
+        token = await self._get_token()
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        async for page in self._iter_agent_pages(url, params, headers):
+            for item in page:
+                yield item
+
+    async def _fetch_and_parse_agents(self, url: str, params: Dict[str, Any], headers: Dict[str, str], previous: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Streams the agent listing page by page and starts each agent's detail
+        fetch + parse as soon as its page arrives. At most `detail_concurrency`
+        detail requests are in flight, and once the listing is complete the
+        remaining details get `detail_deadline` seconds to finish. Results keep
+        list order; a failed or timed-out detail falls back to the list item.
+        Agents found unchanged in `previous` skip the detail fetch entirely.
+        """
+        semaphore = asyncio.Semaphore(self.detail_concurrency)
+        known = {a.get("id"): a for a in previous or []}
+
+        async def fetch_details(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_agent_details(item["id"], headers)
+
+        items = []
+        results = [] # parsed agent (reused) or detail task, per item
+        try:
+            async for page in self._iter_agent_pages(url, params, headers):
+                for item in page:
+                    items.append(item)
+                    stamp = agent_stamp(item)
+                    prev = known.get(item.get("id"))
+                    if prev is not None and stamp is not None and prev.get("updatedAt") == stamp:
+                        results.append(dict(prev))
+                    elif item.get("id"):
+                        results.append(asyncio.ensure_future(fetch_details(item)))
+                    else:
+                        results.append(None)
+        except BaseException:
+            for r in results:
+                if isinstance(r, asyncio.Future):
+                    r.cancel()
+            raise
+
+        tasks = [r for r in results if isinstance(r, asyncio.Future)]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.detail_deadline)
+            for t in pending:
+                t.cancel()
+            if pending:
+                print(f"Agent details deadline reached, {len(pending)} of {len(tasks)} agents left as list items")
+        metrics.AGENT_DETAILS.inc(sum(1 for r in results if isinstance(r, dict)), result="reused")
+        metrics.AGENT_DETAILS.inc(len(tasks), result="fetched")
+
+        # Everything not reused is parsed in one batch: the fetched details, or the
+        # list item when the detail failed or timed out (no updatedAt, so the next
+        # refresh retries the details)
+        to_parse = []
+        stamps = []
+        for item, r in zip(items, results):
+            if isinstance(r, dict):
+                continue
+            if r is not None and r.done() and not r.cancelled() and r.exception() is None and r.result():
+                to_parse.append(r.result())
+                stamps.append(agent_stamp(item))
+            else:
+                to_parse.append(item)
+                stamps.append(None)
+        with metrics.PHASE_DURATION.time(phase="agent_parse"):
+            # Inline: one project's agents parse in well under a millisecond each,
+            # far from what a process pool would pay off for
+            parsed_batch = iter(parse_agents(to_parse, processes=1))
+
+        full_agents = []
+        stamp_iter = iter(stamps)
+        for r in results:
+            if isinstance(r, dict):
+                full_agents.append(r)
+            else:
+                parsed = next(parsed_batch)
+                parsed["updatedAt"] = next(stamp_iter)
+                full_agents.append(parsed)
+        return full_agents
+
+    async def get_agent_details(self, agent_id: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
         try:
             url = f"{self.project_endpoint.rstrip('/')}/agents/{agent_id}"
             params = {"api-version": self.api_version}
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = await self.transport.get(url, params=params, headers=headers, timeout=10, endpoint="agent_detail")
             if response.status_code == 200:
                 return response.json()
         except Exception:
@@ -259,111 +471,7 @@ class FoundryClient:
     def parse_agent_graph_data(self, agent: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parses agent data into a structure suitable for graph visualization.
-        Returns:
-            {
-                "id": str,
-                "name": str,
-                "model": str,
-                "tools": List[Dict],
-                "resources": List[Dict]
-            }
+        See agent_parser.parse_agent; the crawl parses each project's agents in
+        one agent_parser.parse_agents batch.
         """
-        # Extract details from 'versions' -> 'latest' if available
-        latest_version = agent.get('versions', {}).get('latest', {})
-        definition = latest_version.get('definition', {})
-        
-        # Fallback
-        name = agent.get('name', 'Unknown Agent')
-        agent_id = agent.get('id', 'unknown')
-        model = definition.get('model') or agent.get('model') or "Unknown Model"
-        
-        tools_data = []
-        raw_tools = definition.get("tools") or agent.get("tools", [])
-        
-        # Get resources map to link with tools (e.g. file_search -> vector_store)
-        raw_resources = definition.get("tool_resources") or agent.get("resources", {})
-
-        for t in raw_tools:
-            t_type = t.get('type', 'unknown')
-            tool_info = {"type": t_type}
-            if "name" in t:
-                tool_info["name"] = t["name"]
-            
-            # Connection info
-            if "connection_id" in t:
-                tool_info["connection"] = t["connection_id"].split('/')[-1]
-            
-            # --- Specific Tool Logic ---
-            
-            # 1. MCP Tool
-            if t_type == "mcp":
-                # Try to find server_label or project_connection_id
-                if "server_label" in t:
-                    tool_info["connection"] = t["server_label"]
-                elif "project_connection_id" in t:
-                    tool_info["connection"] = t["project_connection_id"]
-                elif "server_url" in t:
-                    tool_info["connection"] = t["server_url"]
-
-            # 2. File Search
-            elif t_type == "file_search":
-                # Check if there is a vector store associated in resources
-                fs_resources = raw_resources.get("file_search", {})
-                vs_ids = fs_resources.get("vector_store_ids", [])
-                if vs_ids:
-                    # Display the first vector store ID
-                    tool_info["connection"] = f"VS: {vs_ids[0]}"
-
-            # 3. Memory Search (Bing Grounding, etc.)
-            elif "memory" in t_type or "search" in t_type:
-                 # Check resources for memory stores
-                 # Sometimes memory config is in the tool definition itself or resources
-                 # Try to find memory_store_name in tool definition first
-                 if "memory_store_name" in t:
-                     tool_info["connection"] = t["memory_store_name"]
-                 else:
-                     # Check resources
-                     mem_resources = raw_resources.get(t_type, {})
-                     if not mem_resources and "memory_search" in raw_resources:
-                         mem_resources = raw_resources["memory_search"]
-                     
-                     if isinstance(mem_resources, dict):
-                         if "memory_store_name" in mem_resources:
-                             tool_info["connection"] = mem_resources["memory_store_name"]
-
-            # 4. Azure AI Search / Cognitive Search
-            if "azure_ai_search" in t_type or "cognitive_search" in t_type:
-                 if "index_name" in t:
-                     tool_info["connection"] = f"Index: {t['index_name']}"
-
-            # Other resource IDs (fallback)
-            for k, v in t.items():
-                if k not in ["type", "name", "connection_id", "server_label", "server_url", "project_connection_id"] and isinstance(v, str) and "/subscriptions/" in v:
-                     tool_info["resource_id"] = v.split('/')[-1]
-            
-            tools_data.append(tool_info)
-
-        resources_data = []
-        if raw_resources:
-             for k, v in raw_resources.items():
-                # Skip file_search here if we handled it in tools to avoid duplication, 
-                # or keep it if we want to show it as a separate resource node.
-                # Let's keep it for completeness but maybe format it better.
-                if isinstance(v, dict):
-                    for sub_k, sub_v in v.items():
-                         resources_data.append({"type": k, "detail": f"{sub_k}: {sub_v}"})
-                else:
-                    resources_data.append({"type": k, "detail": str(v)})
-
-        # Extract timestamps
-        created_at = agent.get('created_at')
-        # Use updated_at as proxy for last used if explicit last_used not found
-        last_used_at = agent.get('last_run_at') or agent.get('updated_at')
-
-        return {
-            "id": agent_id,
-            "name": name,
-            "model": model,
-            "tools": tools_data,
-            "resources": resources_data
-        }
+        return parse_agent(agent)
@@ -0,0 +1,154 @@
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# Node kinds, in the order used by the "kinds" list of the payload
+NODE_KINDS = ("agent", "model", "tool", "resource")
+AGENT, MODEL, TOOL, RESOURCE = range(len(NODE_KINDS))
+
+NodeKey = Tuple[int, int, int, int]
+
+
+class StringTable:
+    """Interned strings: each distinct value is stored once and referenced by index."""
+
+    __slots__ = ("strings", "_index")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        """Index of `value`, -1 for None."""
+        if value is None:
+            return -1
+        ref = self._index.get(value)
+        if ref is None:
+            ref = len(self.strings)
+            self._index[value] = ref
+            self.strings.append(value)
+        return ref
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class GraphStore:
+    """
+    Agent -> model / tool -> connection graph in columnar form.
+    Model, tool (type + name + connection) and connection nodes are shared by
+    every agent that uses them, and all labels are interned, so the graph
+    costs a few machine ints per node and edge instead of a dict per tool per
+    agent. A tool node has at most one connection, which keeps every
+    agent -> tool -> connection path exact.
+
+    Nodes:  kind, label, type (tools only, else -1)
+    Edges:  source, target (node indexes, deduplicated)
+    Agents: node, id, project (one row per agent, string refs)
+    """
+
+    __slots__ = (
+        "strings",
+        "node_kind", "node_label", "node_type",
+        "edge_source", "edge_target",
+        "agent_node", "agent_id", "agent_project",
+        "_nodes", "_edges", "_payload",
+    )
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.node_kind = array("B")
+        self.node_label = array("i")
+        self.node_type = array("i")
+        self.edge_source = array("i")
+        self.edge_target = array("i")
+        self.agent_node = array("i")
+        self.agent_id = array("i")
+        self.agent_project = array("i")
+        self._nodes: Dict[NodeKey, int] = {}
+        self._edges = set()
+        self._payload: Optional[Dict[str, Any]] = None
+
+    def _node(self, key: NodeKey, label: int, node_type: int = -1) -> int:
+        node = self._nodes.get(key)
+        if node is None:
+            node = len(self.node_kind)
+            self._nodes[key] = node
+            self.node_kind.append(key[0])
+            self.node_label.append(label)
+            self.node_type.append(node_type)
+        return node
+
+    def _edge(self, source: int, target: int) -> None:
+        pair = (source, target)
+        if pair not in self._edges:
+            self._edges.add(pair)
+            self.edge_source.append(source)
+            self.edge_target.append(target)
+
+    def add_agent(self, project_id: str, agent: Dict[str, Any]) -> int:
+        """Adds one parsed agent (see agent_parser.parse_agent) and returns its node."""
+        self._payload = None
+        intern = self.strings.intern
+        project_ref = intern(project_id)
+        id_ref = intern(agent.get("id"))
+        # Agent ids are only unique within a project
+        agent_node = self._node((AGENT, project_ref, id_ref, -1), intern(agent.get("name")))
+        self.agent_node.append(agent_node)
+        self.agent_id.append(id_ref)
+        self.agent_project.append(project_ref)
+
+        model = agent.get("model")
+        if model:
+            model_ref = intern(model)
+            self._edge(agent_node, self._node((MODEL, model_ref, -1, -1), model_ref))
+
+        for tool in agent.get("tools", []):
+            type_ref = intern(tool.get("type"))
+            name_ref = intern(tool.get("name") or tool.get("type"))
+            # Tools reaching different connections stay separate nodes, otherwise
+            # every agent of a shared tool would appear to reach all its connections
+            connection_ref = intern(tool.get("connection") or None)
+            tool_node = self._node((TOOL, type_ref, name_ref, connection_ref), name_ref, type_ref)
+            self._edge(agent_node, tool_node)
+            if connection_ref >= 0:
+                self._edge(tool_node, self._node((RESOURCE, connection_ref, -1, -1), connection_ref))
+        return agent_node
+
+    def add_project(self, project_id: str, agents: List[Dict[str, Any]]) -> None:
+        for agent in agents:
+            self.add_agent(project_id, agent)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "agents": len(self.agent_node),
+            "nodes": len(self.node_kind),
+            "edges": len(self.edge_source),
+            "strings": len(self.strings),
+        }
+
+    def to_payload(self) -> Dict[str, Any]:
+        """JSON shape served by /api/graph: parallel integer columns plus one string table."""
+        if self._payload is None:
+            self._payload = self._build_payload()
+        return self._payload
+
+    def _build_payload(self) -> Dict[str, Any]:
+        return {
+            "kinds": list(NODE_KINDS),
+            "strings": self.strings.strings,
+            "nodes": {
+                "kind": self.node_kind.tolist(),
+                "label": self.node_label.tolist(),
+                "type": self.node_type.tolist(),
+            },
+            "edges": {
+                "source": self.edge_source.tolist(),
+                "target": self.edge_target.tolist(),
+            },
+            "agents": {
+                "node": self.agent_node.tolist(),
+                "id": self.agent_id.tolist(),
+                "project": self.agent_project.tolist(),
+            },
+            "counts": self.counts(),
+        }
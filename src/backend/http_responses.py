@@ -0,0 +1,343 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import mimetypes
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+import metrics
+
+# Optional fast paths: pip install orjson brotli
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies below this are sent uncompressed (the headers would eat the savings)
+COMPRESS_MIN_BYTES = int(os.getenv("FOUNDRY_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("FOUNDRY_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("FOUNDRY_BROTLI_QUALITY", "5"))
+# Compressed bodies kept by ETag, so unchanged responses are compressed once
+COMPRESSED_CACHE_ENTRIES = int(os.getenv("FOUNDRY_COMPRESSED_CACHE_ENTRIES", "64"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+# Responses that must be revalidated (ETag) on every use
+REVALIDATE = "no-cache"
+# Static assets requested with their current content hash (?v=...)
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# --- JSON ---
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, through orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass # e.g. integers beyond 64 bits: the stdlib handles those
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(). Handlers returning large payloads
+    return it directly, which also skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# --- Conditional requests and compression ---
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def accepted_encoding(header: str) -> Optional[str]:
+    """Best content coding we can produce for an Accept-Encoding header ("br", "gzip" or None)."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    """Incremental gzip / brotli, flushed per chunk so streamed events are not held back."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _set_header(headers: List[Tuple[bytes, bytes]], name: bytes, value: Optional[str]) -> List[Tuple[bytes, bytes]]:
+    headers = [(k, v) for k, v in headers if k.lower() != name]
+    if value is not None:
+        headers.append((name, value.encode("latin-1")))
+    return headers
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = [v.decode("latin-1") for k, v in headers if k.lower() == b"vary"]
+    if any("accept-encoding" in v.lower() for v in vary):
+        return headers
+    return _set_header(headers, b"vary", ", ".join(vary + ["Accept-Encoding"]))
+
+
+class HTTPCacheMiddleware:
+    """
+    ASGI middleware for GET responses:
+      - responses sent in one piece get a content-hash ETag (unless they have
+        one already) and become 304 Not Modified when If-None-Match matches
+      - text / JSON bodies of at least COMPRESS_MIN_BYTES are compressed with
+        brotli (when installed) or gzip; streamed bodies (NDJSON) are
+        compressed chunk by chunk
+    Images and anything already encoded pass through unchanged.
+    """
+
+    def __init__(self, app: Any, min_bytes: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+        self._compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        encoding = accepted_encoding(request_headers.get(b"accept-encoding", ""))
+        if_none_match = request_headers.get(b"if-none-match")
+        start: Optional[Dict[str, Any]] = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def wrapped_send(message: Dict[str, Any]) -> None:
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if stream is not None:
+                await send({"type": "http.response.body", "body": stream.chunk(body, not more), "more_body": more})
+                return
+
+            headers = list(start["headers"])
+            names = {k.lower(): v.decode("latin-1") for k, v in headers}
+            can_compress = (
+                encoding is not None and b"content-encoding" not in names
+                and _compressible(names.get(b"content-type", ""))
+            )
+            if more:
+                # Streamed body: compress it as it goes, or pass it through untouched
+                if can_compress and start["status"] == 200:
+                    stream = _StreamCompressor(encoding)
+                    headers = _add_vary(_set_header(headers, b"content-length", None))
+                    headers = _set_header(headers, b"content-encoding", encoding)
+                    await send(dict(start, headers=headers))
+                    await send({"type": "http.response.body", "body": stream.chunk(body, False), "more_body": True})
+                else:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                return
+
+            # Whole body in hand
+            status = start["status"]
+            etag = names.get(b"etag")
+            if status == 200 and etag is None:
+                etag = 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+                headers = _set_header(headers, b"etag", etag)
+                if b"cache-control" not in names:
+                    headers = _set_header(headers, b"cache-control", REVALIDATE)
+            if status == 200 and if_none_match is not None and _etag_matches(if_none_match, etag):
+                kept = [(k, v) for k, v in headers if k.lower() in (b"etag", b"cache-control", b"vary", b"content-location", b"expires", b"date")]
+                if _compressible(names.get(b"content-type", "")):
+                    kept = _add_vary(kept)
+                metrics.API_NOT_MODIFIED.inc()
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            sent_encoding = names.get(b"content-encoding", "identity")
+            if can_compress and status == 200 and len(body) >= self.min_bytes:
+                body = self._compress(etag, body, encoding)
+                sent_encoding = encoding
+                headers = _set_header(headers, b"content-encoding", encoding)
+                headers = _set_header(headers, b"content-length", str(len(body)))
+                headers = _add_vary(headers)
+            metrics.API_RESPONSE_BYTES.inc(len(body), encoding=sent_encoding)
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, wrapped_send)
+
+    def _compress(self, etag: str, body: bytes, encoding: str) -> bytes:
+        key = (etag, encoding)
+        compressed = self._compressed.get(key)
+        if compressed is not None:
+            self._compressed.move_to_end(key)
+            return compressed
+        compressed = compress(body, encoding)
+        self._compressed[key] = compressed
+        while len(self._compressed) > COMPRESSED_CACHE_ENTRIES:
+            self._compressed.popitem(last=False)
+        return compressed
+
+
+# --- Fingerprinted static assets ---
+
+# /static/<path> references inside HTML / JS / CSS, with an optional ?v=...
+_STATIC_REF = re.compile(r"/static/([A-Za-z0-9_\-./]+\.[A-Za-z0-9]+)(\?v=[A-Za-z0-9_\-.]*)?")
+_REWRITTEN_SUFFIXES = (".html", ".js", ".css")
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles that versions assets by content hash. References to
+    /static/... in HTML, JS and CSS get "?v=<hash>" (rewritten when served),
+    and a request carrying the current hash is cached as immutable; any other
+    request is revalidated with the ETag / Last-Modified validators.
+    """
+
+    def __init__(self, *, directory: str, prefix: str = "/static"):
+        super().__init__(directory=directory)
+        self.prefix = prefix
+        self._root = os.path.realpath(directory)
+        # full path -> ((mtime, size), hash, rewritten body or None, (referenced path, its hash)...)
+        self._assets: Dict[str, Tuple[Tuple[int, int], str, Optional[bytes], Tuple[Tuple[str, str], ...]]] = {}
+        self._resolving: set = set()
+        # References collected by the rewrites in progress (innermost last)
+        self._references: List[List[Tuple[str, str]]] = []
+
+    def _asset(self, full_path: str) -> Optional[Tuple[str, Optional[bytes]]]:
+        """(content hash, rewritten body for HTML / JS / CSS) of a file under the static root."""
+        if full_path in self._resolving:
+            return None # a reference cycle: leave that one unversioned
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._assets.get(full_path)
+        if cached is not None and cached[0] == stamp and self._references_current(cached[3]):
+            return cached[1], cached[2]
+        self._resolving.add(full_path)
+        references: List[Tuple[str, str]] = []
+        self._references.append(references)
+        try:
+            with open(full_path, "rb") as f:
+                data = f.read()
+            body = None
+            if full_path.endswith(_REWRITTEN_SUFFIXES):
+                # The hash covers the rewritten text, so it changes when a referenced asset does
+                body = data = self.rewrite(data.decode("utf-8")).encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()[:12]
+        finally:
+            self._references.pop()
+            self._resolving.discard(full_path)
+        self._assets[full_path] = (stamp, digest, body, tuple(references))
+        return digest, body
+
+    def _references_current(self, references: Tuple[Tuple[str, str], ...]) -> bool:
+        # A rewritten file is stale as soon as anything it points at has a new hash
+        for full_path, digest in references:
+            asset = self._asset(full_path)
+            if asset is None or asset[0] != digest:
+                return False
+        return True
+
+    def version(self, relative_path: str) -> Optional[str]:
+        if ".." in relative_path.split("/"):
+            return None
+        full_path = os.path.realpath(os.path.join(self._root, relative_path))
+        if not full_path.startswith(self._root + os.sep):
+            return None
+        asset = self._asset(full_path)
+        if asset is None:
+            return None
+        if self._references:
+            self._references[-1].append((full_path, asset[0]))
+        return asset[0]
+
+    def rewrite(self, text: str) -> str:
+        """Points /static/... references in `text` at their current versions."""
+        def versioned(match: "re.Match") -> str:
+            digest = self.version(match.group(1))
+            if digest is None:
+                return match.group(0)
+            return f"{self.prefix}/{match.group(1)}?v={digest}"
+        return _STATIC_REF.sub(versioned, text)
+
+    def file_response(self, full_path: Any, stat_result: os.stat_result, scope: Dict[str, Any], status_code: int = 200) -> Response:
+        asset = self._asset(os.path.realpath(full_path))
+        if asset is not None and asset[1] is not None and status_code == 200:
+            # Rewritten text: HTTPCacheMiddleware adds the ETag / 304
+            media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+            response: Response = Response(asset[1], media_type=media_type)
+        else:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        requested = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [None])[0]
+        if asset is not None and requested == asset[0]:
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = REVALIDATE
+        return response
@@ -0,0 +1,433 @@
+import os
+import time
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import foundry_client
+from foundry_client import FoundryClient
+import metrics
+from errors import FoundryError, WarmingUpError, as_foundry_error
+from graph_store import GraphStore
+from inventory_archive import InventoryArchive
+from query_index import QueryIndex
+from response_cache import CacheKey, ResponseCache, cache_key
+from role_index import RoleAssignmentIndex, subscription_of
+
+RESOURCES_API_VERSION = "+".join([
+    foundry_client.COG_ACCOUNTS_API_VERSION,
+    foundry_client.ML_WORKSPACES_API_VERSION,
+    foundry_client.HUB_PROJECTS_API_VERSION,
+])
+
+# Bounds for the server-side crawl behind /api/inventory
+INVENTORY_SUBSCRIPTION_CONCURRENCY = int(os.getenv("FOUNDRY_INVENTORY_SUBSCRIPTION_CONCURRENCY", "4"))
+INVENTORY_PROJECT_CONCURRENCY = int(os.getenv("FOUNDRY_INVENTORY_PROJECT_CONCURRENCY", "8"))
+# Events the crawl may get ahead of its consumer (a slow client or export writer) before it waits
+INVENTORY_QUEUE_SIZE = int(os.getenv("FOUNDRY_INVENTORY_QUEUE_SIZE", "64"))
+
+
+# --- Cached loaders (shared by the /api handlers and the inventory crawl) ---
+
+# Exported snapshot served instead of Azure (see use_archive)
+archive: Optional[InventoryArchive] = None
+
+
+def use_archive(new_archive: Optional[InventoryArchive]) -> None:
+    """Serves every loader from an exported inventory (None: back to live Azure calls)."""
+    global archive
+    archive = new_archive
+    _role_indexes.clear()
+    _graph_view.reset()
+    _query_index_view.reset()
+
+
+# Loader clients raise when the call as a whole fails: a failed load keeps the
+# cached value (fresh or stale) instead of overwriting it with an empty result,
+# and only a cold miss surfaces the error. Sub-listings inside a call (one hub's
+# projects, a project's role assignments) are still skipped on a 4xx by the
+# client. With refresh=True the entry is reloaded regardless of its age (used
+# by the scheduler)
+
+def subscriptions_key() -> CacheKey:
+    return cache_key("subscriptions", "", foundry_client.SUBSCRIPTIONS_API_VERSION)
+
+
+def resources_key(subscription_id: str) -> CacheKey:
+    return cache_key("resources", subscription_id, RESOURCES_API_VERSION)
+
+
+def agents_key(project_endpoint: str, project_id: Optional[str]) -> CacheKey:
+    return cache_key("agents", f"{project_endpoint}|{project_id or ''}", foundry_client.AGENTS_API_VERSION)
+
+
+def role_assignments_key(subscription_id: str) -> CacheKey:
+    return cache_key("role_assignments", subscription_id, foundry_client.ROLE_ASSIGNMENTS_API_VERSION)
+
+
+async def _load(cache: ResponseCache, key: CacheKey, loader: Callable[[], Awaitable[Any]], refresh: bool) -> Any:
+    if archive is not None:
+        # Archive reads are local and cheap; nothing to cache or refresh
+        return archive.get(key[0], key[1])
+    if refresh:
+        return await cache.refresh(key, loader)
+    return await cache.get_or_load(key, loader)
+
+
+async def load_subscriptions(cache: ResponseCache, refresh: bool = False) -> List[Dict[str, Any]]:
+    client = FoundryClient(raise_errors=True) # No endpoint needed
+    key = subscriptions_key()
+    return await _load(cache, key, client.get_subscriptions, refresh)
+
+
+async def load_resources(cache: ResponseCache, subscription_id: str, refresh: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    client = FoundryClient(raise_errors=True)
+    key = resources_key(subscription_id)
+    return await _load(cache, key, lambda: client.get_foundry_resources(subscription_id), refresh)
+
+
+async def load_agents(cache: ResponseCache, project_endpoint: str, project_id: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+    client = FoundryClient(project_endpoint=project_endpoint, raise_errors=True)
+    key = agents_key(project_endpoint, project_id)
+
+    async def loader() -> List[Dict[str, Any]]:
+        # Access counts come from the subscription's role index when it is readable
+        access_count = None
+        if project_id:
+            index = await load_role_index(cache, subscription_of(project_id) or "")
+            if index is not None:
+                access_count = index.principal_count(project_id)
+        # get_agents returns parsed agents with access info; passing the cached
+        # (possibly snapshot-restored) list makes the refresh incremental
+        return await client.get_agents(project_id=project_id, previous=cache.get(key), access_count=access_count)
+
+    return await _load(cache, key, loader, refresh)
+
+
+async def load_access(cache: ResponseCache, resource_id: str) -> List[Dict[str, Any]]:
+    index = await load_role_index(cache, subscription_of(resource_id) or "")
+    if index is not None:
+        return index.for_resource(resource_id)
+
+    # No subscription-wide read access: ask ARM for this resource only
+    # We need a client, but endpoint doesn't matter for this call
+    client = FoundryClient(project_endpoint="dummy", raise_errors=True)
+    key = cache_key("access", resource_id, foundry_client.ROLE_ASSIGNMENTS_API_VERSION)
+    return await _load(cache, key, lambda: client.get_role_assignments(resource_id), False)
+
+
+# Subscription id -> (cached assignment list the index was built from, index)
+_role_indexes: Dict[str, Tuple[List[Dict[str, Any]], RoleAssignmentIndex]] = {}
+
+
+async def load_role_assignments(cache: ResponseCache, subscription_id: str, refresh: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Raw subscription-scope role assignment listing, without building an index.
+    None when the listing is not readable (e.g. 403).
+    """
+    if not subscription_id:
+        return None
+    client = FoundryClient(raise_errors=True)
+    scope = f"/subscriptions/{subscription_id}"
+    key = role_assignments_key(subscription_id)
+
+    async def loader() -> Optional[List[Dict[str, Any]]]:
+        try:
+            return await client.get_role_assignments(scope)
+        except FoundryError:
+            raise
+        except Exception:
+            if cache.get(key) is not None:
+                raise # keep the listing we have
+            # Cached as "not readable" for the TTL instead of retrying every call
+            return None
+
+    return await _load(cache, key, loader, refresh)
+
+
+async def load_role_index(cache: ResponseCache, subscription_id: str, refresh: bool = False) -> Optional[RoleAssignmentIndex]:
+    """
+    Role assignment index built from one subscription-scope listing.
+    None when the subscription-scope listing is not readable (e.g. 403), in
+    which case callers fall back to per-resource lookups.
+    """
+    return _role_index_for(subscription_id, await load_role_assignments(cache, subscription_id, refresh))
+
+
+def _role_index_for(subscription_id: str, assignments: Optional[List[Dict[str, Any]]]) -> Optional[RoleAssignmentIndex]:
+    if assignments is None:
+        return None
+    built = _role_indexes.get(subscription_id)
+    if built is None or built[0] is not assignments:
+        built = (assignments, RoleAssignmentIndex(subscription_id, assignments))
+        _role_indexes[subscription_id] = built
+    return built[1]
+
+
+def release_role_index(cache: ResponseCache, subscription_id: str) -> None:
+    """Drops a subscription's role index and cached listing (an export that has written them)."""
+    _role_indexes.pop(subscription_id, None)
+    cache.invalidate("role_assignments", subscription_id)
+
+
+# --- Full crawl ---
+
+async def crawl_inventory(cache: ResponseCache) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Crawls subscription -> hub -> project -> agent concurrently and yields
+    events as soon as each piece is available:
+
+        {"type": "subscriptions", "subscriptions": [...]}
+        {"type": "resources", "subscriptionId": str, "hubs": [...], "projects": [...]}
+        {"type": "agents", "subscriptionId": str, "projectId": str, "projectName": str,
+         "projectEndpoint": str, "agents": [...]}
+        {"type": "error", "subscriptionId": str, "projectId": str (agents only),
+         "error": {"error": "throttled" | "upstream_error" | "circuit_open" | "request_failed", ...}}
+        {"type": "done", "subscriptions": int, "projects": int, "agents": int,
+         "errors": int, "durationMs": int, "version": int | None}
+
+    "version" is the change feed version the crawl started from: passing it
+    to /api/changes returns everything that changed since.
+    """
+    started = time.perf_counter()
+    version = cache.feed.version if cache.feed is not None else None
+    queue: asyncio.Queue = asyncio.Queue(maxsize=INVENTORY_QUEUE_SIZE)
+    sub_semaphore = asyncio.Semaphore(INVENTORY_SUBSCRIPTION_CONCURRENCY)
+    project_semaphore = asyncio.Semaphore(INVENTORY_PROJECT_CONCURRENCY)
+    counts = {"projects": 0, "agents": 0, "errors": 0}
+
+    async def put_error(error: FoundryError, subscription_id: str, project_id: Optional[str] = None) -> None:
+        counts["errors"] += 1
+        event = {"type": "error", "subscriptionId": subscription_id, "error": error.to_dict()}
+        if project_id:
+            event["projectId"] = project_id
+        await queue.put(event)
+
+    async def crawl_project(subscription_id: str, project: Dict[str, Any]) -> None:
+        try:
+            async with project_semaphore:
+                agents = await load_agents(cache, project["endpoint"], project["id"])
+        except Exception as e:
+            await put_error(as_foundry_error(e), subscription_id, project["id"])
+            return
+        counts["agents"] += len(agents)
+        await queue.put({
+            "type": "agents",
+            "subscriptionId": subscription_id,
+            "projectId": project["id"],
+            "projectName": project["name"],
+            "projectEndpoint": project["endpoint"],
+            "agents": agents,
+        })
+
+    async def crawl_subscription(subscription_id: str) -> None:
+        try:
+            async with sub_semaphore:
+                resources = await load_resources(cache, subscription_id)
+        except Exception as e:
+            await put_error(as_foundry_error(e), subscription_id)
+            return
+        projects = resources.get("projects", [])
+        counts["projects"] += len(projects)
+        await queue.put(dict(resources, type="resources", subscriptionId=subscription_id))
+        await asyncio.gather(*(crawl_project(subscription_id, p) for p in projects))
+
+    try:
+        subscriptions = await load_subscriptions(cache)
+    except Exception as e:
+        yield {"type": "error", "error": as_foundry_error(e).to_dict()}
+        subscriptions = []
+    yield {"type": "subscriptions", "subscriptions": subscriptions}
+
+    tasks = [asyncio.ensure_future(crawl_subscription(sub["subscriptionId"])) for sub in subscriptions]
+
+    async def crawl_all() -> List[Any]:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await queue.put(None)
+        return results
+
+    crawl = asyncio.ensure_future(crawl_all())
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield event
+    finally:
+        # Client went away mid-stream: stop crawling on its behalf
+        if not crawl.done():
+            crawl.cancel()
+            for t in tasks:
+                t.cancel()
+
+    for sub, result in zip(subscriptions, await crawl):
+        if isinstance(result, Exception):
+            print(f"Error crawling subscription {sub['subscriptionId']}: {result}")
+
+    metrics.PHASE_DURATION.observe(time.perf_counter() - started, phase="crawl")
+    yield {
+        "type": "done",
+        "subscriptions": len(subscriptions),
+        "projects": counts["projects"],
+        "agents": counts["agents"],
+        "errors": counts["errors"],
+        "durationMs": int((time.perf_counter() - started) * 1000),
+        "version": version,
+    }
+
+
+# --- Derived views (graph, query index) ---
+
+# Seconds clients are told to wait while a cold cache is being filled
+WARMUP_RETRY_AFTER = 5.0
+
+ProjectAgents = List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+
+
+def _peek(cache: ResponseCache, key: CacheKey) -> Any:
+    """Cached value for `key` without loading it (the archive's when serving one)."""
+    if archive is not None:
+        return archive.get(key[0], key[1])
+    return cache.get(key)
+
+
+def _inventory_version(cache: ResponseCache) -> int:
+    # An archive never changes (use_archive resets the views); the cache's
+    # write counter moves on every store
+    return -1 if archive is not None else cache.writes
+
+
+def _cached_inventory(cache: ResponseCache) -> Optional[Tuple[ProjectAgents, List[RoleAssignmentIndex]]]:
+    """
+    (project, agent list) by project id and the readable role indexes, from
+    what is cached right now; None when not even the subscriptions are.
+    Never calls Azure, so it is cheap enough to run after every cache write.
+    """
+    subscriptions = _peek(cache, subscriptions_key())
+    if subscriptions is None:
+        return None
+    projects: ProjectAgents = []
+    role_indexes = []
+    for sub in subscriptions:
+        subscription_id = sub["subscriptionId"]
+        resources = _peek(cache, resources_key(subscription_id)) or {}
+        for project in resources.get("projects", []):
+            agents = _peek(cache, agents_key(project["endpoint"], project["id"]))
+            if agents is not None:
+                projects.append(({"id": project["id"], "name": project["name"], "endpoint": project["endpoint"]}, agents))
+        assignments = _peek(cache, role_assignments_key(subscription_id))
+        index = _role_index_for(subscription_id, assignments)
+        if index is not None:
+            role_indexes.append(index)
+    projects.sort(key=lambda p: p[0]["id"])
+    return projects, role_indexes
+
+
+def _same_sources(built: Optional[List[Any]], sources: List[Any]) -> bool:
+    return built is not None and len(built) == len(sources) and all(a is b for a, b in zip(built, sources))
+
+
+async def _drain(events: AsyncIterator[Dict[str, Any]]) -> None:
+    async for _ in events:
+        pass
+
+
+class DerivedView:
+    """
+    A view over the whole cached inventory (the graph, the query index).
+    It is built from cache contents alone, never by calling Azure. A request
+    that finds the cache written to since the last build waits for a rebuild
+    (one at a time, shared by concurrent requests), which only does real work
+    when one of the agent lists / role indexes it was built from has been
+    replaced. So a client that has just seen new agents in the crawl or the
+    change feed finds them in the view. Before the first build a request gets
+    WarmingUpError while a crawl fills the cache, instead of running it inline.
+    """
+
+    def __init__(self, phase: str, build: Callable[[ProjectAgents, List[RoleAssignmentIndex]], Any], uses_roles: bool):
+        self.phase = phase
+        self.build = build
+        self.uses_roles = uses_roles
+        self.value: Any = None
+        # Cache version the value was built from
+        self.version: Optional[int] = None
+        self.sources: Optional[List[Any]] = None
+        self._task: Optional[asyncio.Future] = None
+
+    async def get(self, cache: ResponseCache) -> Any:
+        version = _inventory_version(cache)
+        # A rebuild already running may have started before the writes this request saw
+        while self.version is None or self.version < version:
+            try:
+                # Shielded: a client going away does not cancel the build other requests share
+                await asyncio.shield(self._rebuild_soon(cache))
+            except Exception:
+                if self.value is None:
+                    raise
+                break # _on_built has printed it; serve the last build
+            if self.version is None:
+                break # not even the subscriptions are cached
+        # Nothing (or not a single project) cached yet: answer once the crawl has filled the cache
+        if (not self.sources and _warm_up(cache)) or self.value is None:
+            raise WarmingUpError("Inventory is being crawled, retry shortly", retry_after=WARMUP_RETRY_AFTER)
+        return self.value
+
+    def _rebuild_soon(self, cache: ResponseCache) -> asyncio.Future:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._rebuild(cache))
+            self._task.add_done_callback(self._on_built)
+        return self._task
+
+    def _on_built(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error building {self.phase}: {future.exception()}")
+
+    async def _rebuild(self, cache: ResponseCache) -> None:
+        version = _inventory_version(cache)
+        cached = _cached_inventory(cache)
+        if cached is None:
+            return
+        projects, role_indexes = cached
+        sources = [agents for _, agents in projects] + (role_indexes if self.uses_roles else [])
+        if not _same_sources(self.sources, sources):
+            # CPU-bound (about 0.5s per 50k agents for the query index): keep it off the event loop
+            with metrics.PHASE_DURATION.time(phase=self.phase):
+                self.value = await asyncio.get_running_loop().run_in_executor(None, self.build, projects, role_indexes)
+            self.sources = sources
+        self.version = version
+
+    def reset(self) -> None:
+        self.value = self.version = self.sources = None
+
+
+def _build_graph(projects: ProjectAgents, role_indexes: List[RoleAssignmentIndex]) -> GraphStore:
+    graph = GraphStore()
+    for project, agents in projects:
+        graph.add_project(project["id"], agents)
+    return graph
+
+
+_graph_view = DerivedView("graph_build", _build_graph, uses_roles=False)
+_query_index_view = DerivedView("query_index_build", QueryIndex, uses_roles=True)
+# Crawl started to fill a cold cache for the views
+_warm_task: Optional[asyncio.Future] = None
+
+
+def _warm_up(cache: ResponseCache) -> bool:
+    """
+    Starts one crawl to fill the cache (another one later only if the first
+    left not even the subscriptions cached). True while it is running.
+    """
+    global _warm_task
+    if _warm_task is None or (_warm_task.done() and _cached_inventory(cache) is None):
+        _warm_task = asyncio.ensure_future(_drain(crawl_inventory(cache)))
+    return not _warm_task.done()
+
+
+async def load_graph(cache: ResponseCache) -> GraphStore:
+    """Compact agent/model/tool graph over the whole cached inventory (see DerivedView)."""
+    return await _graph_view.get(cache)
+
+
+async def load_query_index(cache: ResponseCache) -> QueryIndex:
+    """Inverted indexes over the whole cached inventory (see DerivedView)."""
+    return await _query_index_view.get(cache)
@@ -0,0 +1,191 @@
+import os
+import mmap
+import json
+import time
+import zlib
+import struct
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+# Offline inventory snapshots (see export_inventory.py).
+#
+# The file is a sequence of gzip members, one per crawl event, so `zcat`
+# yields the same NDJSON as /api/inventory. Each member header carries its
+# total size (FEXTRA subfield "FG", uint32) and "<cache kind>\t<scope>" in
+# FCOMMENT, so an index of the whole file is built from the headers alone and
+# a member is only decompressed when it is read.
+
+ARCHIVE_FORMAT = 1
+# Decoded members kept in memory; repeated reads return the same objects
+ARCHIVE_CACHE_MEMBERS = int(os.getenv("FOUNDRY_ARCHIVE_CACHE_MEMBERS", "1024"))
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_FEXTRA = 0x04
+_FNAME = 0x08
+_FCOMMENT = 0x10
+_FHCRC = 0x02
+_SIZE_SUBFIELD = b"FG"
+
+# Values returned for (kind, scope) pairs the archive does not contain
+_MISSING = {
+    "subscriptions": lambda: [],
+    "resources": lambda: {"hubs": [], "projects": []},
+    "agents": lambda: [],
+    "role_assignments": lambda: None, # unknown: callers fall back to "access"
+    "access": lambda: [],
+}
+
+
+def _event_value(kind: str, event: Dict[str, Any]) -> Any:
+    """Cache value (as the inventory loaders return it) stored in a crawl event."""
+    if kind == "resources":
+        return {"hubs": event.get("hubs", []), "projects": event.get("projects", [])}
+    if kind == "subscriptions":
+        return event.get("subscriptions", [])
+    if kind == "agents":
+        return event.get("agents", [])
+    if kind in ("role_assignments", "access"):
+        return event.get("assignments")
+    return event
+
+
+class ArchiveWriter:
+    """Appends crawl events to a file object, one gzip member each."""
+
+    def __init__(self, fileobj: BinaryIO, level: int = 6):
+        self.fileobj = fileobj
+        self.level = level
+        self.members = 0
+        self.raw_bytes = 0
+
+    def write(self, kind: str, scope: str, event: Dict[str, Any]) -> None:
+        data = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(data) + compressor.flush()
+        comment = f"{kind}\t{scope}".encode("utf-8").replace(b"\0", b"") + b"\0"
+        extra_len = 2 + 2 + 4
+        total = 10 + 2 + extra_len + len(comment) + len(body) + 8
+        header = (
+            _GZIP_MAGIC + b"\x08" + bytes([_FEXTRA | _FCOMMENT])
+            + struct.pack("<I", int(time.time())) + b"\x00\xff"
+            + struct.pack("<H", extra_len) + _SIZE_SUBFIELD + struct.pack("<HI", 4, total)
+            + comment
+        )
+        trailer = struct.pack("<II", zlib.crc32(data) & 0xFFFFFFFF, len(data) & 0xFFFFFFFF)
+        self.fileobj.write(header + body + trailer)
+        self.members += 1
+        self.raw_bytes += len(data)
+
+    def write_meta(self, **fields: Any) -> None:
+        self.write("meta", "", dict(fields, type="meta", format=ARCHIVE_FORMAT, createdAt=time.time()))
+
+
+class InventoryArchive:
+    """
+    Read-only, memory-mapped view of an exported inventory. Opening only maps
+    the file; the (kind, scope) -> member index is built on first use from the
+    member headers, and members are decompressed when read.
+    """
+
+    def __init__(self, path: str, cache_members: int = ARCHIVE_CACHE_MEMBERS):
+        self.path = path
+        if os.path.getsize(path) == 0:
+            raise ValueError(f"{path}: empty inventory archive")
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index: Optional[Dict[Tuple[str, str], int]] = None
+        self._decoded: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.cache_members = cache_members
+
+    def _header(self, offset: int) -> Tuple[int, int, str]:
+        """(start of the deflate data, total member size, comment) of the member at `offset`."""
+        m = self._map
+        if m[offset:offset + 2] != _GZIP_MAGIC or m[offset + 2] != 8:
+            raise ValueError(f"{self.path}: not a gzip member at byte {offset}")
+        flags = m[offset + 3]
+        if not flags & _FEXTRA:
+            raise ValueError(f"{self.path}: member at byte {offset} has no size field (not written by export_inventory?)")
+        pos = offset + 10
+        (xlen,) = struct.unpack_from("<H", m, pos)
+        pos += 2
+        extra_end = pos + xlen
+        total = None
+        while pos + 4 <= extra_end:
+            subfield = m[pos:pos + 2]
+            (length,) = struct.unpack_from("<H", m, pos + 2)
+            if subfield == _SIZE_SUBFIELD and length == 4:
+                (total,) = struct.unpack_from("<I", m, pos + 4)
+            pos += 4 + length
+        if total is None:
+            raise ValueError(f"{self.path}: member at byte {offset} has no size field (not written by export_inventory?)")
+        pos = extra_end
+        if flags & _FNAME:
+            pos = m.find(b"\0", pos) + 1
+        comment = ""
+        if flags & _FCOMMENT:
+            end = m.find(b"\0", pos)
+            comment = m[pos:end].decode("utf-8", "replace")
+            pos = end + 1
+        if flags & _FHCRC:
+            pos += 2
+        return pos, total, comment
+
+    @property
+    def index(self) -> Dict[Tuple[str, str], int]:
+        if self._index is None:
+            index = {}
+            offset, size = 0, len(self._map)
+            while offset < size:
+                _, total, comment = self._header(offset)
+                kind, _, scope = comment.partition("\t")
+                # A later member for the same key (e.g. a retried project) wins
+                index[(kind, scope)] = offset
+                offset += total
+            self._index = index
+        return self._index
+
+    def _read(self, offset: int) -> Dict[str, Any]:
+        event = self._decoded.get(offset)
+        if event is not None:
+            self._decoded.move_to_end(offset)
+            return event
+        start, total, _ = self._header(offset)
+        data = zlib.decompress(self._map[start:offset + total - 8], -zlib.MAX_WBITS)
+        event = json.loads(data)
+        self._decoded[offset] = event
+        if len(self._decoded) > self.cache_members:
+            self._decoded.popitem(last=False)
+        return event
+
+    def event(self, kind: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        offset = self.index.get((kind, scope))
+        return self._read(offset) if offset is not None else None
+
+    def get(self, kind: str, scope: str = "") -> Any:
+        """The value the inventory loader for (kind, scope) would return."""
+        event = self.event(kind, scope)
+        if event is None:
+            return _MISSING.get(kind, lambda: None)()
+        return _event_value(kind, event)
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """Every event in file order (decompressed one at a time, not cached)."""
+        offset, size = 0, len(self._map)
+        while offset < size:
+            start, total, _ = self._header(offset)
+            yield json.loads(zlib.decompress(self._map[start:offset + total - 8], -zlib.MAX_WBITS))
+            offset += total
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.event("meta") or {}
+
+    def stats(self) -> Dict[str, Any]:
+        kinds: Dict[str, int] = {}
+        for kind, _ in self.index:
+            kinds[kind] = kinds.get(kind, 0) + 1
+        return {"path": self.path, "bytes": len(self._map), "members": kinds, "decoded": len(self._decoded), "meta": self.meta}
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
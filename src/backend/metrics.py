@@ -0,0 +1,187 @@
+import os
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Optional per-call trace spans: set FOUNDRY_TRACING=1 and install / configure
+# the OpenTelemetry SDK and an exporter; spans go to the global tracer provider
+TRACING_ENABLED = os.getenv("FOUNDRY_TRACING", "0") not in ("0", "false", "False", "")
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:
+    _otel_trace = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, Any] = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _label_text(self, key: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in sorted(self._values.items())]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size # per bucket, not cumulative
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.bounds = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = _HistogramValue(len(self.bounds) + 1)
+        entry.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        entry.sum += value
+        entry.count += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: Any) -> Dict[str, float]:
+        entry = self._values.get(self._key(labels))
+        return {"count": entry.count, "sum": entry.sum} if entry else {"count": 0, "sum": 0.0}
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), entry.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._label_text(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {entry.sum}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {entry.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """Trace span around a block when tracing is enabled, else a no-op yielding None."""
+    if not TRACING_ENABLED or _otel_trace is None:
+        yield None
+        return
+    tracer = _otel_trace.get_tracer("foundry-governance")
+    with tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+# --- Outbound calls (endpoint: subscriptions, cog_accounts, ml_workspaces, hub_projects,
+# role_assignments, agents_list, agent_detail) ---
+
+HTTP_DURATION = Histogram("foundry_http_request_duration_seconds", "Duration of outbound HTTP calls (one per attempt)", ["endpoint"])
+HTTP_RESPONSES = Counter("foundry_http_responses_total", "Outbound HTTP responses by status code (\"error\" for connection failures)", ["endpoint", "status"])
+HTTP_RESPONSE_BYTES = Counter("foundry_http_response_bytes_total", "Bytes received from outbound HTTP calls", ["endpoint"])
+HTTP_INFLIGHT = Gauge("foundry_http_inflight_requests", "Outbound HTTP calls currently in flight", ["endpoint"])
+HTTP_RETRIES = Counter("foundry_http_retries_total", "Outbound HTTP calls retried, by the status that caused it", ["endpoint", "status"])
+HTTP_CIRCUIT_REJECTIONS = Counter("foundry_http_circuit_rejections_total", "Calls rejected by an open circuit breaker", ["endpoint"])
+
+# --- Crawl / parsing phases ---
+
+PHASE_DURATION = Histogram("foundry_phase_duration_seconds", "Duration of crawl and parsing phases", ["phase"])
+AGENT_DETAILS = Counter("foundry_agent_details_total", "Agents per crawl: detail re-fetched, or reused unchanged from the cached list", ["result"])
+
+# --- Caches ---
+
+CACHE_LOOKUPS = Counter("foundry_cache_lookups_total", "Response cache lookups by result (hit, stale, miss)", ["kind", "result"])
+CACHE_HIT_RATIO = Gauge("foundry_cache_hit_ratio", "Hit ratio since start (response cache: fresh + stale hits)", ["cache"])
+CACHE_ENTRIES = Gauge("foundry_cache_entries", "Entries held", ["cache"])
+CACHE_INFLIGHT = Gauge("foundry_cache_inflight_loads", "Cache loads currently running", ["cache"])
+
+# --- Served responses (see http_responses.HTTPCacheMiddleware) ---
+
+API_NOT_MODIFIED = Counter("foundry_api_not_modified_total", "GET requests answered 304 Not Modified from If-None-Match")
+API_RESPONSE_BYTES = Counter("foundry_api_response_bytes_total", "Body bytes sent for whole (non-streamed) GET responses, by content coding", ["encoding"])
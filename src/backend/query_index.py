@@ -0,0 +1,277 @@
+import os
+import heapq
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from role_index import RoleAssignmentIndex, ancestor_scopes
+
+# Governance flags ("Risk" facet / "Top 5 Governance Actions")
+DEPRECATED_MODELS = frozenset(
+    m.strip().lower()
+    for m in os.getenv(
+        "FOUNDRY_DEPRECATED_MODELS",
+        "gpt-35-turbo,gpt-35-turbo-16k,gpt-35-turbo-instruct,gpt-4-32k,gpt-4-vision-preview,text-davinci-003",
+    ).split(",")
+    if m.strip()
+)
+# Agents whose project is reachable by at least this many principals
+BROAD_ACCESS_THRESHOLD = int(os.getenv("FOUNDRY_BROAD_ACCESS_THRESHOLD", "25"))
+
+# Flag -> action shown to the user, in severity order
+GOVERNANCE_ACTIONS = {
+    "deprecated_model": "Agent using deprecated model",
+    "external_mcp": "Agent calling an external MCP server",
+    "broad_access": "Agent in a project with broad access",
+    "unknown_model": "Agent with no resolvable model",
+}
+
+FACETS = ("model", "tool", "connection", "project", "flag")
+# Results memoized per index; the index is immutable, so they never go stale
+QUERY_CACHE_SIZE = 256
+
+try:
+    _popcount = int.bit_count # Python 3.10+
+except AttributeError:
+    def _popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def _by_count(count: Tuple[str, int]) -> Tuple[int, str]:
+    return (-count[1], count[0])
+
+
+def _mask_of(rows: Iterable[int], size: int) -> int:
+    # Built in one pass: OR-ing bits into a growing int one at a time is quadratic
+    buf = bytearray((size + 7) // 8)
+    for row in rows:
+        buf[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buf, "little")
+
+
+def agent_flags(agent: Dict[str, Any]) -> List[str]:
+    flags = []
+    model = (agent.get("model") or "").lower()
+    if model in DEPRECATED_MODELS:
+        flags.append("deprecated_model")
+    if any(t.get("type") == "mcp" and str(t.get("connection", "")).startswith("http") for t in agent.get("tools", [])):
+        flags.append("external_mcp")
+    if (agent.get("accessCount") or 0) >= BROAD_ACCESS_THRESHOLD:
+        flags.append("broad_access")
+    if not model or model == "unknown model":
+        flags.append("unknown_model")
+    return flags
+
+
+class QueryIndex:
+    """
+    Inverted indexes over the crawled agents for server-side filtering and
+    faceting. Agents are numbered by name, and every indexed value (model,
+    tool type, connection, project, governance flag) maps to a bitmask of
+    the agents carrying it, so filters are ANDs/ORs of ints and facet counts
+    are popcounts, and a page of results is read off in name order.
+
+    principal -> scopes comes from the subscriptions' role assignment indexes;
+    filtering by principal keeps agents in projects the principal can reach
+    through an assignment on the project or one of its ancestors.
+    """
+
+    def __init__(
+        self,
+        projects: Iterable[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+        role_indexes: Iterable[RoleAssignmentIndex] = (),
+    ):
+        rows = []
+        for project, agents in projects:
+            for agent in agents:
+                rows.append((agent, project))
+        rows.sort(key=lambda r: ((r[0].get("name") or "").lower(), r[1].get("id") or ""))
+
+        self.agents: List[Dict[str, Any]] = [agent for agent, _ in rows]
+        self.projects: List[Dict[str, Any]] = [project for _, project in rows]
+        self.all = (1 << len(rows)) - 1
+        self._names = [(agent.get("name") or "").lower() for agent in self.agents]
+
+        # facet -> value -> rows, turned into bitmasks below
+        postings: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        project_rows: Dict[str, List[int]] = {}
+        for row, (agent, project) in enumerate(rows):
+            values = {
+                "model": [agent.get("model") or "Unknown Model"],
+                "tool": [t.get("type", "unknown") for t in agent.get("tools", [])],
+                "connection": [t["connection"] for t in agent.get("tools", []) if t.get("connection")],
+                "project": [project.get("name") or project.get("id") or ""],
+                "flag": agent_flags(agent),
+            }
+            for facet, facet_values in values.items():
+                for value in facet_values:
+                    postings[facet].setdefault(value, []).append(row)
+            project_rows.setdefault((project.get("id") or "").lower(), []).append(row)
+
+        size = len(rows)
+        self.postings: Dict[str, Dict[str, int]] = {
+            facet: {value: _mask_of(value_rows, size) for value, value_rows in values.items()}
+            for facet, values in postings.items()
+        }
+        # Facet counts with no filter applied, ranked once instead of per query
+        self._unfiltered: Dict[str, List[Tuple[str, int]]] = {
+            facet: sorted(((value, _popcount(mask)) for value, mask in values.items()), key=_by_count)
+            for facet, values in self.postings.items()
+        }
+        self._project_masks = {project_id: _mask_of(r, size) for project_id, r in project_rows.items()}
+
+        self.principal_scopes: Dict[str, Set[str]] = {}
+        self.principal_types: Dict[str, Optional[str]] = {}
+        for index in role_indexes:
+            for principal_id, scopes in index.scopes_by_principal().items():
+                self.principal_scopes.setdefault(principal_id, set()).update(scopes)
+            for principal_id, principal_type in index.principals.items():
+                self.principal_types.setdefault(principal_id, principal_type)
+        self._principal_masks: Dict[str, int] = {}
+        self._results: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        # Facets do not depend on the page: paging through results reuses them
+        self._facets: "OrderedDict[Any, Dict[str, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def principal_mask(self, principal_id: str) -> int:
+        mask = self._principal_masks.get(principal_id)
+        if mask is None:
+            scopes = self.principal_scopes.get(principal_id, set())
+            # Scopes outside /subscriptions (management groups, root) cover every project
+            if any(not s.startswith("/subscriptions/") for s in scopes):
+                mask = self.all
+            else:
+                mask = 0
+                for project_id, project_mask in self._project_masks.items():
+                    if any(s in scopes for s in ancestor_scopes(project_id)):
+                        mask |= project_mask
+            self._principal_masks[principal_id] = mask
+        return mask
+
+    def _facet_mask(self, facet: str, values: List[str]) -> int:
+        # OR within a facet
+        postings = self.postings[facet]
+        mask = 0
+        for value in values:
+            mask |= postings.get(value, 0)
+        return mask
+
+    def _text_mask(self, text: str) -> int:
+        text = text.lower()
+        return _mask_of((row for row, name in enumerate(self._names) if text in name), len(self._names))
+
+    def query(
+        self,
+        filters: Optional[Dict[str, List[str]]] = None,
+        text: Optional[str] = None,
+        principal: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+        facet_limit: int = 20,
+    ) -> Dict[str, Any]:
+        """
+        Agents matching every facet filter (values ORed within a facet), the
+        name substring `text` and `principal`, in name order. Each facet counts
+        values over the agents matching all the *other* filters, so selecting
+        a model still shows the counts of the other models.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if v and f in self.postings}
+        key = (tuple(sorted((f, tuple(v)) for f, v in filters.items())), text, principal, offset, limit, facet_limit)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        base = self.all
+        if text:
+            base &= self._text_mask(text)
+        if principal:
+            base &= self.principal_mask(principal)
+        facet_masks = {facet: self._facet_mask(facet, values) for facet, values in filters.items()}
+
+        matched = base
+        for mask in facet_masks.values():
+            matched &= mask
+
+        facets_key = (key[0], text, principal, facet_limit)
+        facets = self._facets.get(facets_key)
+        if facets is None:
+            facets = self._facets[facets_key] = self._count_facets(base, facet_masks, facet_limit)
+            if len(self._facets) > QUERY_CACHE_SIZE:
+                self._facets.popitem(last=False)
+        else:
+            self._facets.move_to_end(facets_key)
+
+        result = {
+            "total": _popcount(matched),
+            "offset": offset,
+            "limit": limit,
+            "items": [self._item(row) for row in self._rows(matched, offset, limit)],
+            "facets": facets,
+        }
+        self._results[key] = result
+        if len(self._results) > QUERY_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return result
+
+    def _count_facets(self, base: int, facet_masks: Dict[str, int], facet_limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        facets = {}
+        for facet in FACETS:
+            others = base
+            for other, mask in facet_masks.items():
+                if other != facet:
+                    others &= mask
+            if others == self.all:
+                top = self._unfiltered[facet][:facet_limit]
+            else:
+                counts = ((value, _popcount(posting & others)) for value, posting in self.postings[facet].items())
+                top = heapq.nsmallest(facet_limit, (c for c in counts if c[1]), key=_by_count)
+            facets[facet] = [{"value": value, "count": count} for value, count in top]
+        return facets
+
+    def _rows(self, mask: int, offset: int, limit: int) -> List[int]:
+        # Lowest bit first, i.e. name order
+        bits = bin(mask)[:1:-1]
+        rows = []
+        pos = bits.find("1")
+        skipped = 0
+        while pos != -1 and len(rows) < limit:
+            if skipped < offset:
+                skipped += 1
+            else:
+                rows.append(pos)
+            pos = bits.find("1", pos + 1)
+        return rows
+
+    def _item(self, row: int) -> Dict[str, Any]:
+        project = self.projects[row]
+        return dict(
+            self.agents[row],
+            projectName=project.get("name"),
+            projectEndpoint=project.get("endpoint"),
+            flags=agent_flags(self.agents[row]),
+        )
+
+    def actions(self, limit: int = 5, sample: int = 3) -> List[Dict[str, Any]]:
+        """Top governance actions: flags ranked by the number of agents they affect."""
+        actions = []
+        for flag, title in GOVERNANCE_ACTIONS.items():
+            mask = self.postings["flag"].get(flag, 0)
+            if mask:
+                actions.append({
+                    "flag": flag,
+                    "title": title,
+                    "count": _popcount(mask),
+                    "agents": [self._item(row) for row in self._rows(mask, 0, sample)],
+                })
+        actions.sort(key=lambda a: -a["count"])
+        return actions[:limit]
+
+    def principal(self, principal_id: str) -> Dict[str, Any]:
+        return {
+            "principalId": principal_id,
+            "principalType": self.principal_types.get(principal_id),
+            "scopes": sorted(self.principal_scopes.get(principal_id, set())),
+            "agents": _popcount(self.principal_mask(principal_id)),
+        }
@@ -0,0 +1,194 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import metrics
+
+# Governance data changes on a scale of minutes; TTLs are per kind of response
+DEFAULT_TTLS = {
+    "subscriptions": 600,
+    "resources": 300,
+    "agents": 120,
+    "access": 120,
+    "role_assignments": 300,
+}
+DEFAULT_TTL = 120
+CACHE_MAX_ENTRIES = int(os.getenv("FOUNDRY_CACHE_MAX_ENTRIES", "2048"))
+# How long past its TTL an entry may still be served while it is refreshed
+CACHE_STALE_SECONDS = int(os.getenv("FOUNDRY_CACHE_STALE_SECONDS", "600"))
+
+CacheKey = Tuple[str, str, str]
+
+
+def scope_matches(key_scope: str, scope: str) -> bool:
+    if key_scope == scope:
+        return True
+    return bool(scope) and (key_scope.endswith("|" + scope) or key_scope.startswith(scope + "|"))
+
+
+def cache_key(kind: str, scope: str, api_version: str) -> CacheKey:
+    """(endpoint kind, subscription/project scope, api-version)"""
+    return (kind, scope or "", api_version or "")
+
+
+def _ttls_from_env() -> Dict[str, int]:
+    ttls = dict(DEFAULT_TTLS)
+    for kind in ttls:
+        value = os.getenv(f"FOUNDRY_CACHE_TTL_{kind.upper()}")
+        if value:
+            ttls[kind] = int(value)
+    return ttls
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-memory TTL + LRU cache for FoundryClient results.
+    Fresh entries are returned directly. Entries past their TTL but inside the
+    stale window are returned immediately while one background load refreshes
+    them. Misses wait on a load that is shared by all concurrent callers.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, int]] = None,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        stale_seconds: int = CACHE_STALE_SECONDS,
+        store: Optional[Any] = None,
+        feed: Optional[Any] = None,
+    ):
+        self.ttls = ttls if ttls is not None else _ttls_from_env()
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        # Optional write-through persistence (see snapshot_store.SnapshotStore)
+        self.store = store
+        # Optional observer of every stored value (see change_feed.ChangeFeed)
+        self.feed = feed
+        # Keys a background refresher is currently keeping fresh: reads serve
+        # whatever is cached, of any age, and only load on a miss. Every other
+        # key goes through the TTL / stale-while-revalidate path
+        self.background_keys: Set[CacheKey] = set()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every write / invalidation: derived views compare it to know they are behind
+        self.writes = 0
+
+    def ttl_for(self, key: CacheKey) -> int:
+        return self.ttls.get(key[0], DEFAULT_TTL)
+
+    async def get_or_load(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None:
+            if now < entry.expires_at or key in self.background_keys:
+                self.hits += 1
+                metrics.CACHE_LOOKUPS.inc(kind=key[0], result="hit")
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.expires_at + self.stale_seconds:
+                self.stale_hits += 1
+                metrics.CACHE_LOOKUPS.inc(kind=key[0], result="stale")
+                self._entries.move_to_end(key)
+                self._load(key, loader)
+                return entry.value
+
+        self.misses += 1
+        metrics.CACHE_LOOKUPS.inc(kind=key[0], result="miss")
+        return await asyncio.shield(self._load(key, loader))
+
+    async def refresh(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Reloads an entry regardless of its age; a failed load keeps the old value."""
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run_loader(key, loader))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._on_loaded(key, f))
+        return future
+
+    async def _run_loader(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        self.set(key, value)
+        return value
+
+    def _on_loaded(self, key: CacheKey, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Retrieve background failures so they are not reported as "never retrieved"
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error refreshing cache entry {key}: {future.exception()}")
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Returns a cached value (fresh or stale) without loading it."""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: CacheKey, value: Any, stored_at: Optional[float] = None, persist: bool = True) -> None:
+        stored_at = stored_at if stored_at is not None else time.time()
+        self._entries[key] = _Entry(value, stored_at, stored_at + self.ttl_for(key))
+        self._entries.move_to_end(key)
+        self.writes += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if self.feed is not None:
+            self.feed.observe(key, value)
+        if persist and self.store is not None:
+            self._persist(key, value, stored_at)
+
+    def _persist(self, key: CacheKey, value: Any, stored_at: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.store.save(key, value, stored_at)
+            return
+        # SQLite writes are blocking, keep them off the event loop
+        future = loop.run_in_executor(None, self.store.save, key, value, stored_at)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"Error persisting cache entry {key}: {f.exception()}")
+        )
+
+    def invalidate(self, kind: Optional[str] = None, scope: Optional[str] = None) -> int:
+        """
+        Drops every entry matching kind and/or scope (all entries when both are
+        None). Agents are cached under "<project endpoint>|<project id>"; either
+        half matches too.
+        """
+        keys = [
+            k for k in self._entries
+            if (kind is None or k[0] == kind) and (scope is None or scope_matches(k[1], scope))
+        ]
+        for k in keys:
+            del self._entries[k]
+        self.writes += 1
+        if self.store is not None:
+            self.store.delete(kind=kind, scope=scope)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": ((self.hits + self.stale_hits) / lookups) if lookups else 0.0,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,88 @@
+import bisect
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+
+def ancestor_scopes(resource_id: str) -> List[str]:
+    """'/subscriptions/s/resourceGroups/rg' -> ['/subscriptions', '/subscriptions/s', ...] (lowercased)."""
+    parts = resource_id.lower().rstrip("/").split("/")
+    return ["/".join(parts[:i]) for i in range(2, len(parts) + 1)]
+
+
+class RoleAssignmentIndex:
+    """
+    All role assignments visible from one subscription-scope listing, indexed
+    by scope so the assignments of any resource in the subscription (inherited
+    from the subscription, resource group or hub, direct, or on child scopes)
+    are resolved locally. Principal and role definition ids are interned and
+    deduplicated across assignments.
+    """
+
+    def __init__(self, subscription_id: str, assignments: List[Dict[str, Any]]):
+        self.subscription_id = subscription_id
+        self.principals: Dict[str, str] = {} # principalId -> principalType
+        self.role_definitions: Dict[str, int] = {} # roleDefinitionId -> assignment count
+        self._by_scope: Dict[str, List[Dict[str, Any]]] = {}
+        # Assignments above the subscription (management groups, root) apply everywhere
+        self._global: List[Dict[str, Any]] = []
+        self._principals_by_scope: Dict[str, Set[str]] = {}
+
+        for assignment in assignments:
+            props = assignment.get("properties", {})
+            principal_id = sys.intern(props.get("principalId", ""))
+            role_id = sys.intern(props.get("roleDefinitionId", ""))
+            self.principals.setdefault(principal_id, props.get("principalType"))
+            self.role_definitions[role_id] = self.role_definitions.get(role_id, 0) + 1
+
+            scope = (props.get("scope") or "").lower().rstrip("/")
+            if not scope.startswith("/subscriptions/"):
+                self._global.append(assignment)
+                continue
+            self._by_scope.setdefault(scope, []).append(assignment)
+            self._principals_by_scope.setdefault(scope, set()).add(principal_id)
+
+        self._scopes = sorted(self._by_scope)
+        self._global_principals = set(
+            a.get("properties", {}).get("principalId", "") for a in self._global
+        )
+
+    def _matching_scopes(self, resource_id: str) -> List[str]:
+        resource = resource_id.lower().rstrip("/")
+        scopes = [s for s in ancestor_scopes(resource) if s in self._by_scope]
+        # Child scopes: everything sorted between "resource/" and "resource/￿"
+        start = bisect.bisect_left(self._scopes, resource + "/")
+        end = bisect.bisect_left(self._scopes, resource + "/￿")
+        scopes.extend(self._scopes[start:end])
+        return scopes
+
+    def for_resource(self, resource_id: str) -> List[Dict[str, Any]]:
+        """Assignments the ARM roleAssignments listing at `resource_id` would return."""
+        result = list(self._global)
+        for scope in self._matching_scopes(resource_id):
+            result.extend(self._by_scope[scope])
+        return result
+
+    def principal_count(self, resource_id: str) -> int:
+        principals = set(self._global_principals)
+        for scope in self._matching_scopes(resource_id):
+            principals |= self._principals_by_scope[scope]
+        return len(principals)
+
+    def scopes_by_principal(self) -> Dict[str, Set[str]]:
+        """principalId -> lowercased scopes it holds assignments on (incl. management group / root scopes)."""
+        scopes: Dict[str, Set[str]] = {}
+        for scope, principals in self._principals_by_scope.items():
+            for principal_id in principals:
+                scopes.setdefault(principal_id, set()).add(scope)
+        for assignment in self._global:
+            props = assignment.get("properties", {})
+            scope = (props.get("scope") or "/").lower().rstrip("/") or "/"
+            scopes.setdefault(props.get("principalId", ""), set()).add(scope)
+        return scopes
+
+
+def subscription_of(resource_id: str) -> Optional[str]:
+    parts = resource_id.strip("/").split("/")
+    if len(parts) >= 2 and parts[0].lower() == "subscriptions":
+        return parts[1]
+    return None
@@ -0,0 +1,218 @@
+import os
+import time
+import random
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+import inventory
+from errors import FoundryError
+from response_cache import CacheKey, ResponseCache
+from transport import get_transport
+
+REFRESH_ENABLED = os.getenv("FOUNDRY_REFRESH_ENABLED", "1") not in ("0", "false", "False", "")
+# Base interval between two refreshes of the same subscription (seconds)
+REFRESH_INTERVAL = float(os.getenv("FOUNDRY_REFRESH_INTERVAL", "300"))
+# +/- fraction applied to every interval so subscriptions do not refresh in lockstep
+REFRESH_JITTER = float(os.getenv("FOUNDRY_REFRESH_JITTER", "0.2"))
+REFRESH_MAX_BACKOFF = float(os.getenv("FOUNDRY_REFRESH_MAX_BACKOFF", "3600"))
+REFRESH_SUBSCRIPTION_CONCURRENCY = int(os.getenv("FOUNDRY_REFRESH_SUBSCRIPTION_CONCURRENCY", "2"))
+REFRESH_PROJECT_CONCURRENCY = int(os.getenv("FOUNDRY_REFRESH_PROJECT_CONCURRENCY", "8"))
+# "subId:priority,subId:priority"; higher refreshes first, 0 disables background refresh
+REFRESH_PRIORITIES = os.getenv("FOUNDRY_SUBSCRIPTION_PRIORITIES", "")
+
+
+def parse_priorities(value: str) -> Dict[str, int]:
+    priorities = {}
+    for item in value.split(","):
+        if ":" in item:
+            sub_id, priority = item.rsplit(":", 1)
+            priorities[sub_id.strip()] = int(priority)
+    return priorities
+
+
+def _throttle_delay(error: BaseException) -> Optional[float]:
+    """Seconds to wait after throttling / 5xx / an open circuit (Retry-After when given), else None."""
+    if isinstance(error, FoundryError):
+        return error.retry_after or 0.0
+    return None
+
+
+class RefreshScheduler:
+    """
+    Keeps the response cache warm off the request path.
+    Periodically re-crawls subscriptions, their hubs/projects and agents,
+    highest priority first, with jittered intervals and exponential backoff
+    on throttling (429) and server errors (5xx). While running, the /api
+    handlers read the keys it refreshes without triggering loads of their
+    own; anything it does not refresh (priority-0 subscriptions, projects or
+    subscriptions no longer listed, per-resource "access" fallbacks) keeps
+    the cache's normal TTL.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        interval: float = REFRESH_INTERVAL,
+        jitter: float = REFRESH_JITTER,
+        max_backoff: float = REFRESH_MAX_BACKOFF,
+        priorities: Optional[Dict[str, int]] = None,
+    ):
+        self.cache = cache
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.priorities = priorities if priorities is not None else parse_priorities(REFRESH_PRIORITIES)
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        self._subscriptions_next = 0.0
+        self._subscriptions_errors = 0
+        self._task: Optional[asyncio.Task] = None
+        # Subscription id -> cache keys its last refresh covered (see _own)
+        self._owned: Dict[str, Set[CacheKey]] = {}
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            for sub_id in list(self._owned):
+                self._own(sub_id, set())
+            self.cache.background_keys.discard(inventory.subscriptions_key())
+
+    def _own(self, subscription_id: str, keys: Set[CacheKey]) -> None:
+        """Marks `keys` as kept fresh by this scheduler, releasing the subscription's previous ones."""
+        self.cache.background_keys.difference_update(self._owned.pop(subscription_id, set()) - keys)
+        self.cache.background_keys.update(keys)
+        if keys:
+            self._owned[subscription_id] = keys
+
+    # --- Scheduling ---
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _backoff(self, consecutive_errors: int, retry_after: float) -> float:
+        delay = min(self.max_backoff, self.interval * (2 ** (consecutive_errors - 1)))
+        return max(retry_after, self._jittered(delay))
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            if now >= self._subscriptions_next:
+                await self._refresh_subscription_list()
+
+            due = [
+                s for s in self.subscriptions.values()
+                if s["priority"] > 0 and s["nextRefresh"] <= now
+            ]
+            due.sort(key=lambda s: -s["priority"])
+            semaphore = asyncio.Semaphore(REFRESH_SUBSCRIPTION_CONCURRENCY)
+
+            async def refresh(status: Dict[str, Any]) -> None:
+                async with semaphore:
+                    await self.refresh_subscription(status["subscriptionId"])
+
+            await asyncio.gather(*(refresh(s) for s in due))
+
+            upcoming = [s["nextRefresh"] for s in self.subscriptions.values() if s["priority"] > 0]
+            upcoming.append(self._subscriptions_next)
+            await asyncio.sleep(max(1.0, min(upcoming) - time.time()))
+
+    async def _refresh_subscription_list(self) -> None:
+        try:
+            subscriptions = await inventory.load_subscriptions(self.cache, refresh=True)
+            self.cache.background_keys.add(inventory.subscriptions_key())
+            self._subscriptions_errors = 0
+            self._subscriptions_next = time.time() + self._jittered(self.interval)
+        except Exception as e:
+            self._subscriptions_errors += 1
+            delay = _throttle_delay(e)
+            self._subscriptions_next = time.time() + self._backoff(self._subscriptions_errors, delay or 0.0)
+            print(f"Background refresh of subscriptions failed: {e}")
+            return
+
+        seen = set()
+        for sub in subscriptions:
+            sub_id = sub["subscriptionId"]
+            seen.add(sub_id)
+            if sub_id not in self.subscriptions:
+                self.subscriptions[sub_id] = {
+                    "subscriptionId": sub_id,
+                    "displayName": sub.get("displayName"),
+                    "priority": self.priorities.get(sub_id, 1),
+                    "lastRefresh": None,
+                    "lastDuration": None,
+                    "lastError": None,
+                    "errorCount": 0,
+                    "consecutiveErrors": 0,
+                    "projects": 0,
+                    "agents": 0,
+                    "nextRefresh": 0.0,
+                }
+        for sub_id in list(self.subscriptions):
+            if sub_id not in seen:
+                del self.subscriptions[sub_id]
+                self._own(sub_id, set())
+
+    async def refresh_subscription(self, subscription_id: str) -> None:
+        """Re-crawls one subscription (hubs, projects, agents) into the cache."""
+        status = self.subscriptions[subscription_id]
+        started = time.time()
+        try:
+            # Role index first so the agent refreshes below pick up fresh access counts
+            await inventory.load_role_index(self.cache, subscription_id, refresh=True)
+            resources = await inventory.load_resources(self.cache, subscription_id, refresh=True)
+            projects = resources.get("projects", [])
+            self._own(subscription_id, {
+                inventory.role_assignments_key(subscription_id),
+                inventory.resources_key(subscription_id),
+                *(inventory.agents_key(p["endpoint"], p["id"]) for p in projects),
+            })
+            semaphore = asyncio.Semaphore(REFRESH_PROJECT_CONCURRENCY)
+
+            async def refresh_project(project: Dict[str, Any]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await inventory.load_agents(self.cache, project["endpoint"], project["id"], refresh=True)
+
+            results = await asyncio.gather(*(refresh_project(p) for p in projects), return_exceptions=True)
+            errors = [r for r in results if isinstance(r, Exception)]
+            status["projects"] = len(projects)
+            status["agents"] = sum(len(r) for r in results if not isinstance(r, BaseException))
+            if errors:
+                # Throttling errors take precedence so the backoff reflects them
+                errors.sort(key=lambda e: _throttle_delay(e) is None)
+                raise errors[0]
+
+            status["consecutiveErrors"] = 0
+            status["lastError"] = None
+            status["nextRefresh"] = time.time() + self._jittered(self.interval)
+        except Exception as e:
+            status["errorCount"] += 1
+            status["consecutiveErrors"] += 1
+            status["lastError"] = str(e)
+            delay = _throttle_delay(e)
+            if delay is not None:
+                status["nextRefresh"] = time.time() + self._backoff(status["consecutiveErrors"], delay)
+            else:
+                status["nextRefresh"] = time.time() + self._jittered(self.interval)
+            print(f"Background refresh of subscription {subscription_id} failed: {e}")
+        finally:
+            status["lastRefresh"] = time.time()
+            status["lastDuration"] = status["lastRefresh"] - started
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "subscriptionsNextRefresh": self._subscriptions_next,
+            "subscriptions": sorted(self.subscriptions.values(), key=lambda s: -s["priority"]),
+            "breakers": get_transport().breaker_states(),
+        }
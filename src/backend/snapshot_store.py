@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Iterator, Optional, Tuple
+
+from response_cache import CacheKey, ResponseCache
+
+# Set FOUNDRY_SNAPSHOT_PATH to an empty string to disable persistence
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "inventory_snapshot.db",
+)
+SNAPSHOT_PATH = os.getenv("FOUNDRY_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+
+
+class SnapshotStore:
+    """
+    SQLite snapshot of the inventory as produced by FoundryClient:
+    subscriptions, hubs/projects (get_foundry_resources), parsed agents
+    (get_agents) and role assignments (get_role_assignments), one row per
+    response cache key. Loaded back into the cache on startup so a restart
+    serves the last crawl immediately.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        # Writes come from executor threads; one connection guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    kind TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    api_version TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (kind, scope, api_version)
+                )
+                """
+            )
+            self._conn.commit()
+
+    def save(self, key: CacheKey, value: Any, stored_at: Optional[float] = None) -> None:
+        kind, scope, api_version = key
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (kind, scope, api_version, stored_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (kind, scope, api_version, stored_at or time.time(), payload),
+            )
+            self._conn.commit()
+
+    def delete(self, kind: Optional[str] = None, scope: Optional[str] = None) -> int:
+        clauses, args = [], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if scope:
+            # Same matching as response_cache.scope_matches
+            clauses.append("(scope = ? OR substr(scope, -?) = ? OR substr(scope, 1, ?) = ?)")
+            args.extend([scope, len(scope) + 1, "|" + scope, len(scope) + 1, scope + "|"])
+        elif scope is not None:
+            clauses.append("scope = ?")
+            args.append(scope)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM snapshots{where}", args)
+            self._conn.commit()
+            return cursor.rowcount
+
+    def items(self) -> Iterator[Tuple[CacheKey, Any, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, scope, api_version, stored_at, payload FROM snapshots"
+            ).fetchall()
+        for kind, scope, api_version, stored_at, payload in rows:
+            yield (kind, scope, api_version), json.loads(payload), stored_at
+
+    def load_into(self, cache: ResponseCache) -> int:
+        """
+        Seeds the cache from the snapshot. Entries older than their TTL are
+        loaded as just-expired, so they are served immediately while the cache
+        refreshes them in the background.
+        """
+        now = time.time()
+        count = 0
+        for key, value, stored_at in self.items():
+            cache.set(key, value, stored_at=max(stored_at, now - cache.ttl_for(key)), persist=False)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_snapshot_store(path: str = SNAPSHOT_PATH) -> Optional[SnapshotStore]:
+    if not path:
+        return None
+    try:
+        return SnapshotStore(path)
+    except Exception as e:
+        print(f"Error opening snapshot store {path}: {e}")
+        return None
@@ -0,0 +1,329 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+from errors import CircuitOpenError, FoundryError, ThrottledError, UpstreamError
+
+# Pool sizing / timeouts can be tuned per deployment without code changes
+DEFAULT_TIMEOUT = float(os.getenv("FOUNDRY_HTTP_TIMEOUT", "30"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("FOUNDRY_HTTP_CONNECT_TIMEOUT", "10"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("FOUNDRY_HTTP_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE = int(os.getenv("FOUNDRY_HTTP_MAX_KEEPALIVE", "20"))
+DEFAULT_PER_HOST_LIMIT = int(os.getenv("FOUNDRY_HTTP_PER_HOST_LIMIT", "10"))
+
+# Retry policy for 429 / 5xx / connection failures
+DEFAULT_MAX_RETRIES = int(os.getenv("FOUNDRY_HTTP_MAX_RETRIES", "4"))
+DEFAULT_BACKOFF_BASE = float(os.getenv("FOUNDRY_HTTP_BACKOFF_BASE", "0.5"))
+DEFAULT_BACKOFF_MAX = float(os.getenv("FOUNDRY_HTTP_BACKOFF_MAX", "30"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# When ARM reports fewer remaining reads than this, pause the host briefly
+RATELIMIT_LOW_WATERMARK = int(os.getenv("FOUNDRY_RATELIMIT_LOW_WATERMARK", "25"))
+RATELIMIT_PAUSE = float(os.getenv("FOUNDRY_RATELIMIT_PAUSE", "1"))
+
+# Circuit breaker per (endpoint kind, host)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("FOUNDRY_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("FOUNDRY_BREAKER_COOLDOWN", "30"))
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `cooldown` seconds; then lets a single trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    __slots__ = ("threshold", "cooldown", "failures", "opened_at", "trial_inflight")
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_inflight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_inflight:
+            self.trial_inflight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_inflight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_inflight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _ratelimit_remaining(response: httpx.Response) -> Optional[int]:
+    """Lowest x-ms-ratelimit-remaining-* value on an ARM response, if any."""
+    remaining = None
+    for name, value in response.headers.items():
+        if name.lower().startswith("x-ms-ratelimit-remaining-"):
+            try:
+                count = int(value)
+            except ValueError:
+                continue
+            remaining = count if remaining is None else min(remaining, count)
+    return remaining
+
+
+def _pause_scope(host: str, path: str) -> str:
+    """host/subscriptions/<id> for calls inside a subscription, else the host."""
+    parts = path.split("/", 3)
+    if len(parts) > 2 and parts[1].lower() == "subscriptions" and parts[2]:
+        return f"{host}/subscriptions/{parts[2].lower()}"
+    return host
+
+
+class AsyncTransport:
+    """
+    Shared, keep-alive HTTP pool used by every FoundryClient.
+    Connections are reused across requests (one TLS handshake per host instead of
+    one per call) and in-flight requests are capped per host so a single slow
+    endpoint cannot take the whole pool.
+
+    429 / 5xx / connection failures are retried with exponential backoff and
+    jitter, honouring Retry-After. A 429 or a low x-ms-ratelimit-remaining-*
+    header pauses every request to the same subscription (the whole host for
+    calls outside one), not just the one request; a pause longer than
+    backoff_max fails those requests fast instead of holding them. Each endpoint kind
+    has a circuit breaker; when retries are exhausted or the breaker is open a
+    typed FoundryError is raised.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        http_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Replaces the network, e.g. with the local Azure stand-in of benchmarks/fake_azure.py
+        self.http_transport = http_transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # Pause scope (see _pause_scope) -> monotonic time before which no new request is sent
+        self._paused_until: Dict[str, float] = {}
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                transport=self.http_transport,
+            )
+        return self._client
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host_limit)
+            self._host_limits[host] = sem
+        return sem
+
+    def _breaker(self, endpoint: str, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get((endpoint, host))
+        if breaker is None:
+            breaker = CircuitBreaker()
+            self.breakers[(endpoint, host)] = breaker
+        return breaker
+
+    def _pause(self, scope: str, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        if until > self._paused_until.get(scope, 0.0):
+            self._paused_until[scope] = until
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        endpoint: str = "other",
+    ) -> httpx.Response:
+        """
+        GETs `url`, retrying transient failures. Returns the response for any
+        non-retryable status (callers still check 4xx). `endpoint` names the
+        kind of call for the circuit breaker.
+        """
+        client = self._get_client()
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        pause_scope = _pause_scope(host, parts.path)
+        breaker = self._breaker(endpoint, host)
+        if not breaker.allow():
+            metrics.HTTP_CIRCUIT_REJECTIONS.inc(endpoint=endpoint)
+            raise CircuitOpenError(
+                f"Circuit open for {endpoint} on {host}",
+                endpoint=endpoint, url=url, retry_after=breaker.retry_after(),
+            )
+        # allow() only sets the flag when this call is the half-open trial
+        is_trial = breaker.trial_inflight
+
+        request_timeout = httpx.Timeout(timeout or self.timeout, connect=self.connect_timeout)
+        attempt = 0
+        try:
+            while True:
+                paused = self._paused_until.get(pause_scope, 0.0) - time.monotonic()
+                if paused > self.backoff_max:
+                    # Do not hold a request handler for a long Retry-After
+                    raise ThrottledError(
+                        f"Throttled calling {endpoint} ({url}), paused for {paused:.0f}s",
+                        endpoint=endpoint, url=url, status_code=429, retry_after=paused,
+                    )
+                if paused > 0:
+                    await asyncio.sleep(paused)
+
+                error: Optional[FoundryError] = None
+                delay = self._backoff(attempt)
+                try:
+                    async with self._host_limit(host):
+                        response = await self._send(client, url, endpoint, headers=headers, params=params, timeout=request_timeout)
+                except httpx.TransportError as e:
+                    error = UpstreamError(f"{type(e).__name__} calling {endpoint}: {e}", endpoint=endpoint, url=url)
+                else:
+                    remaining = _ratelimit_remaining(response)
+                    if remaining is not None and remaining < RATELIMIT_LOW_WATERMARK:
+                        self._pause(pause_scope, RATELIMIT_PAUSE)
+
+                    if response.status_code not in RETRY_STATUSES:
+                        breaker.record_success()
+                        return response
+
+                    retry_after = _retry_after(response)
+                    if retry_after is not None:
+                        delay = retry_after
+                    if response.status_code == 429:
+                        # ARM throttles per subscription: hold back every call to it, not just this one
+                        self._pause(pause_scope, delay)
+                        error = ThrottledError(
+                            f"Throttled calling {endpoint} ({url})",
+                            endpoint=endpoint, url=url, status_code=429, retry_after=retry_after,
+                        )
+                    else:
+                        error = UpstreamError(
+                            f"HTTP {response.status_code} calling {endpoint} ({url})",
+                            endpoint=endpoint, url=url, status_code=response.status_code, retry_after=retry_after,
+                        )
+
+                if attempt >= self.max_retries or delay > self.backoff_max:
+                    breaker.record_failure()
+                    raise error
+                metrics.HTTP_RETRIES.inc(endpoint=endpoint, status=error.status_code or "error")
+                attempt += 1
+                await asyncio.sleep(delay)
+        finally:
+            # However the trial ended (cancelled, DecodingError, InvalidURL, ...),
+            # do not leave a half-open breaker waiting on it forever
+            if is_trial:
+                breaker.trial_inflight = False
+
+    async def _send(self, client: httpx.AsyncClient, url: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        """One attempt on the wire, timed and counted per endpoint kind."""
+        metrics.HTTP_INFLIGHT.inc(endpoint=endpoint)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with metrics.span(f"GET {endpoint}", **{"http.url": url}) as span:
+                response = await client.get(url, **kwargs)
+                status = str(response.status_code)
+                if span is not None:
+                    span.set_attribute("http.status_code", response.status_code)
+            metrics.HTTP_RESPONSE_BYTES.inc(len(response.content), endpoint=endpoint)
+            return response
+        finally:
+            metrics.HTTP_INFLIGHT.dec(endpoint=endpoint)
+            metrics.HTTP_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+            metrics.HTTP_RESPONSES.inc(endpoint=endpoint, status=status)
+
+    def breaker_states(self) -> Dict[str, str]:
+        return {f"{endpoint}@{host}": b.state for (endpoint, host), b in self.breakers.items()}
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._host_limits = {}
+        self._paused_until = {}
+
+
+_shared_transport: Optional[AsyncTransport] = None
+
+
+def get_transport() -> AsyncTransport:
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = AsyncTransport()
+    return _shared_transport
+
+
+def set_transport(transport: Optional[AsyncTransport]) -> None:
+    """Replaces the shared transport (None resets to a default one on next use)."""
+    global _shared_transport
+    _shared_transport = transport
+
+
+async def close_transport() -> None:
+    global _shared_transport
+    if _shared_transport is not None:
+        await _shared_transport.aclose()
+    _shared_transport = None
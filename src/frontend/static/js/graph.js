@@ -5,6 +5,8 @@ let resourceCache = {};
 let allLoadedAgents = []; // Store all loaded agents for global graph/KPIs
 let charts = {}; // Store Chart.js instances
 let activeLoadingRequests = 0; // Track active fetches
+let compactGraph = null; // Server-built graph (/api/graph), once the inventory is complete
+let inventoryVersion = null; // Change feed version the loaded inventory is current as of (/api/changes)
 
 // Distinct Colors for Agents
 const AGENT_COLORS = [
@@ -237,10 +239,155 @@ window.openAccessDrawer = async function(projectId, projectName) {
 
 async function loadAllData() {
     updateLoadingState(true);
+    try {
+        await streamInventory();
+    } catch (error) {
+        // Older backends (or proxies that buffer streams) fall back to one request per project
+        console.error("Inventory stream failed, loading per project", error);
+        clearTimeout(renderTimer);
+        renderTimer = null;
+        await loadAllDataPerProject();
+    } finally {
+        updateLoadingState(false);
+    }
+}
+
+// Single server-side crawl streamed as NDJSON; the graph renders as projects arrive
+async function streamInventory() {
+    const response = await fetch("/api/inventory");
+    if (!response.ok || !response.body) throw new Error("Failed to fetch inventory");
+
+    resourceCache = {};
+    allLoadedAgents = [];
+    compactGraph = null;
+    inventoryVersion = null;
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.forEach(line => {
+            if (line.trim()) handleInventoryEvent(JSON.parse(line));
+        });
+    }
+    if (buffer.trim()) handleInventoryEvent(JSON.parse(buffer));
+
+    // Served from the cache the crawl just warmed
+    compactGraph = await loadCompactGraph();
+    clearTimeout(renderTimer);
+    renderTimer = null;
+    updateKPIs();
+    applyGlobalFilters(); // This will render graph and table
+}
+
+function handleInventoryEvent(event) {
+    if (event.type === "resources") {
+        resourceCache[event.subscriptionId] = { hubs: event.hubs || [], projects: event.projects || [] };
+        scheduleRender();
+    } else if (event.type === "agents") {
+        event.agents.forEach(a => {
+            a.projectName = event.projectName;
+            a.projectEndpoint = event.projectEndpoint;
+            // a.projectId is already set by backend
+            allLoadedAgents.push(a);
+        });
+        scheduleRender();
+    } else if (event.type === "error") {
+        // Throttled or unavailable upstream: this part of the inventory is missing, not empty
+        console.warn(`Inventory incomplete for ${event.projectId || event.subscriptionId || "subscriptions"}`, event.error);
+    } else if (event.type === "done") {
+        inventoryVersion = event.version;
+    }
+}
+
+// Refresh button: patch in only what changed since the last load, full reload when the server cannot tell
+async function refreshData() {
+    if (inventoryVersion === null || inventoryVersion === undefined) return loadAllData();
+
+    updateLoadingState(true);
+    try {
+        const response = await fetch(`/api/changes?since=${inventoryVersion}`);
+        if (!response.ok) throw new Error("Failed to fetch changes");
+        const feed = await response.json();
+        if (feed.reset) {
+            await loadAllData();
+            return;
+        }
+        inventoryVersion = feed.version;
+        if (!feed.changes.length) return;
+
+        const agentsChanged = applyChanges(feed.changes);
+        if (agentsChanged) compactGraph = await loadCompactGraph();
+        updateKPIs();
+        applyGlobalFilters();
+    } catch (error) {
+        console.error("Incremental refresh failed, reloading", error);
+        await loadAllData();
+    } finally {
+        updateLoadingState(false);
+    }
+}
+
+function applyChanges(changes) {
+    const agentKey = a => `${a.projectId}|${a.id}`;
+    const agentsByKey = new Map(allLoadedAgents.map(a => [agentKey(a), a]));
+    const projectsById = new Map();
+    Object.values(resourceCache).forEach(sub => (sub.projects || []).forEach(p => projectsById.set(p.id, p)));
+    let agentsChanged = false;
+
+    changes.forEach(change => {
+        if (change.entity === "agent") {
+            agentsChanged = true;
+            const existing = agentsByKey.get(change.id);
+            if (change.op === "removed") {
+                agentsByKey.delete(change.id);
+                return;
+            }
+            const agent = change.value;
+            const project = projectsById.get(agent.projectId);
+            agent.projectName = existing ? existing.projectName : (project ? project.name : "");
+            // scope is "projectEndpoint|projectId"
+            agent.projectEndpoint = existing ? existing.projectEndpoint : change.scope.split("|")[0];
+            agentsByKey.set(change.id, agent);
+        } else if (change.entity === "project") {
+            const sub = resourceCache[change.scope] = resourceCache[change.scope] || { hubs: [], projects: [] };
+            sub.projects = (sub.projects || []).filter(p => p.id !== change.id);
+            if (change.op !== "removed") {
+                sub.projects.push(change.value);
+                projectsById.set(change.id, change.value);
+            }
+        }
+        // Role assignments are fetched on demand by the details drawer
+    });
+
+    if (agentsChanged) allLoadedAgents = Array.from(agentsByKey.values());
+    return agentsChanged;
+}
+
+// Coalesce re-renders while the inventory streams in
+let renderTimer = null;
+function scheduleRender() {
+    if (renderTimer) return;
+    renderTimer = setTimeout(() => {
+        renderTimer = null;
+        updateKPIs();
+        applyGlobalFilters();
+    }, 750);
+}
+
+async function loadAllDataPerProject() {
     try {
         const subsResponse = await fetch("/api/subscriptions");
         if (!subsResponse.ok) throw new Error("Failed to fetch subscriptions");
         const subs = await subsResponse.json();
+        resourceCache = {};
+        compactGraph = null;
+        inventoryVersion = null;
 
         const allAgentsPromises = subs.map(async (sub) => {
             try {
@@ -268,8 +415,6 @@ async function loadAllData() {
 
     } catch (error) {
         console.error("Fatal error loading data", error);
-    } finally {
-        updateLoadingState(false);
     }
 }
 
@@ -440,18 +585,46 @@ function renderChart(canvasId, type, label, dataMap, customColors = null) {
     });
 }
 
+// Fixed Colors from Legend
+const NODE_COLORS = {
+    agent: "#a855f7", // Purple
+    model: "#3b82f6", // Blue
+    tool: "#eab308",  // Yellow
+    resource: "#22c55e" // Green
+};
+
+function toolIcon(type) {
+    const t = (type || "").toLowerCase();
+    if (t.includes("search")) return ICONS.search;
+    if (t.includes("code")) return ICONS.code;
+    if (t.includes("retrieval")) return ICONS.database;
+    if (t.includes("mcp")) return "https://img.icons8.com/fluency/96/api-settings.png";
+    return ICONS.tool;
+}
+
+function connectionIcon(name) {
+    const c = name.toLowerCase();
+    if (c.includes("github")) return ICONS.github;
+    if (c.includes("search")) return ICONS.search;
+    if (c.includes("database") || c.includes("sql")) return ICONS.database;
+    return ICONS.resource;
+}
+
 function renderGlobalGraph(agents = allLoadedAgents) {
     if (!document.getElementById("cy")) return;
-    
+
+    if (compactGraph) {
+        initCytoscape(compactGraphElements(compactGraph, agents));
+        return;
+    }
+
+    initCytoscape(agentElements(agents));
+}
+
+// One node per agent, model, tool and connection, built from the agent lists alone
+function agentElements(agents) {
     const elements = [];
-    
-    // Fixed Colors from Legend
-    const COLORS = {
-        agent: "#a855f7", // Purple
-        model: "#3b82f6", // Blue
-        tool: "#eab308",  // Yellow
-        resource: "#22c55e" // Green
-    };
+    const COLORS = NODE_COLORS;
     
     agents.forEach((agent, idx) => {
         // Agent Node
@@ -489,12 +662,6 @@ function renderGlobalGraph(agents = allLoadedAgents) {
         agent.tools.forEach((tool, i) => {
             const toolName = tool.name || tool.type;
             const toolId = `${agent.id}_tool_${i}`;
-            
-            let icon = ICONS.tool;
-            if (tool.type.toLowerCase().includes("search")) icon = ICONS.search;
-            else if (tool.type.toLowerCase().includes("code")) icon = ICONS.code;
-            else if (tool.type.toLowerCase().includes("retrieval")) icon = ICONS.database;
-            else if (tool.type.toLowerCase().includes("mcp")) icon = "https://img.icons8.com/fluency/96/api-settings.png";
 
             // Tool Node
             elements.push({
@@ -502,7 +669,7 @@ function renderGlobalGraph(agents = allLoadedAgents) {
                     id: toolId, 
                     label: toolName, 
                     type: "tool", 
-                    icon: icon, 
+                    icon: toolIcon(tool.type), 
                     color: COLORS.tool 
                 }
             });
@@ -514,18 +681,13 @@ function renderGlobalGraph(agents = allLoadedAgents) {
             if (tool.connection) {
                 const connId = `${toolId}_conn`;
                 const connName = tool.connection;
-                let connIcon = ICONS.resource;
-                
-                if (connName.toLowerCase().includes("github")) connIcon = ICONS.github;
-                else if (connName.toLowerCase().includes("search")) connIcon = ICONS.search;
-                else if (connName.toLowerCase().includes("database") || connName.toLowerCase().includes("sql")) connIcon = ICONS.database;
 
                 elements.push({
                     data: {
                         id: connId,
                         label: connName,
                         type: "resource",
-                        icon: connIcon,
+                        icon: connectionIcon(connName),
                         color: COLORS.resource
                     }
                 });
@@ -536,7 +698,62 @@ function renderGlobalGraph(agents = allLoadedAgents) {
         });
     });
 
-    initCytoscape(elements);
+    return elements;
+}
+
+// Compact graph from /api/graph: model, tool and connection nodes are already
+// deduplicated server-side, so only the nodes reachable from `agents` are picked.
+// Agents the graph does not have (yet) are drawn from their own data instead
+async function loadCompactGraph() {
+    try {
+        const response = await fetch("/api/graph");
+        return response.ok ? await response.json() : null;
+    } catch (e) {
+        console.error("Failed to load compact graph", e);
+        return null;
+    }
+}
+
+function compactGraphElements(graph, agents) {
+    const s = graph.strings;
+    const kinds = graph.nodes.kind;
+    const agentKey = a => `${a.projectId}|${a.id}`;
+    const wanted = new Set(agents.map(agentKey));
+    const found = new Set();
+    const included = new Uint8Array(kinds.length);
+    graph.agents.node.forEach((node, i) => {
+        const key = `${s[graph.agents.project[i]]}|${s[graph.agents.id[i]]}`;
+        if (wanted.has(key)) {
+            included[node] = 1;
+            found.add(key);
+        }
+    });
+
+    const edges = [];
+    const { source, target } = graph.edges;
+    // Agent edges first, then tool -> connection edges of the tools they reached
+    [graph.kinds.indexOf("agent"), graph.kinds.indexOf("tool")].forEach(sourceKind => {
+        for (let i = 0; i < source.length; i++) {
+            if (kinds[source[i]] !== sourceKind || !included[source[i]]) continue;
+            included[target[i]] = 1;
+            edges.push({
+                data: { source: `n${source[i]}`, target: `n${target[i]}`, color: NODE_COLORS[graph.kinds[kinds[target[i]]]] }
+            });
+        }
+    });
+
+    const nodes = [];
+    for (let n = 0; n < kinds.length; n++) {
+        if (!included[n]) continue;
+        const type = graph.kinds[kinds[n]];
+        const label = s[graph.nodes.label[n]];
+        let icon = ICONS[type];
+        if (type === "tool") icon = toolIcon(s[graph.nodes.type[n]]);
+        else if (type === "resource") icon = connectionIcon(label);
+        nodes.push({ data: { id: `n${n}`, label: label, type: type, icon: icon, color: NODE_COLORS[type] } });
+    }
+    const missing = agents.filter(a => !found.has(agentKey(a)));
+    return nodes.concat(edges, agentElements(missing));
 }
 
 function initCytoscape(elements) {
@@ -0,0 +1,52 @@
+"""
+Golden-output tests for agent_parser: every fixture in
+fixtures/agent_parser_golden.json holds an agent and the output the original
+if/elif parser (FoundryClient.parse_agent_graph_data before the table-driven
+rewrite) produced for it.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src", "backend"))
+
+import agent_parser
+from agent_parser import extractors_for, parse_agent, parse_agents, shutdown_parse_pool
+
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "agent_parser_golden.json")) as f:
+    GOLDEN = json.load(f)
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[c["name"] for c in GOLDEN])
+def test_parse_agent_matches_recorded_output(case):
+    assert parse_agent(case["agent"]) == case["expected"]
+
+
+def test_parse_agent_is_stable_across_calls():
+    # Extractors are resolved once per tool type and cached; a second pass must not differ
+    extractors_for.cache_clear()
+    first = [parse_agent(c["agent"]) for c in GOLDEN]
+    second = [parse_agent(c["agent"]) for c in GOLDEN]
+    assert first == second == [c["expected"] for c in GOLDEN]
+
+
+def test_parse_agents_inline_keeps_order():
+    agents = [c["agent"] for c in GOLDEN]
+    assert parse_agents(agents) == [c["expected"] for c in GOLDEN]
+
+
+def test_parse_agents_process_pool_keeps_order(monkeypatch):
+    monkeypatch.setattr(agent_parser, "PARSE_POOL_THRESHOLD", 1)
+    agents = [c["agent"] for c in GOLDEN] * 3
+    try:
+        assert parse_agents(agents, processes=2, chunksize=4) == [c["expected"] for c in GOLDEN] * 3
+        # The second batch reuses the same worker processes
+        pool = agent_parser._pool
+        assert parse_agents(agents, processes=2, chunksize=4) == [c["expected"] for c in GOLDEN] * 3
+        assert agent_parser._pool is pool
+    finally:
+        shutdown_parse_pool()
+    assert agent_parser._pool is None